@@ -1,32 +1,41 @@
+import array
 import asyncpg
+import bcrypt
 import logging
 import os
 import uuid
-import sys
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
-from jose import JWTError, jwt
-from typing import Optional, Dict, List
-from fastapi import Depends, HTTPException, status
+import jwt
+from typing import Callable, Optional, Dict, List
+from fastapi import Depends, HTTPException, Request, status
 import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import secrets
+import threading
 import time
-from dataclasses import dataclass
+from cachetools import TLRUCache, TTLCache
+from dataclasses import dataclass, field
+from enum import IntEnum
+from argon2 import PasswordHasher, Type as Argon2Type
+from argon2.exceptions import InvalidHashError, VerificationError
+from prometheus_client import Gauge
+from .jwt_codec import HS256Codec, OrjsonPyJWT
+from .utils import utc_timestamp
 
-# Add vault directory to Python path
-sys.path.append('/app/vault')
+logger = logging.getLogger(__name__)
 
+# vault_client is resolved through PYTHONPATH (/app/vault is mounted into the container);
+# reuse its shared client instead of connecting a second one
 try:
-    from vault_client import VaultClient, VaultClientError
-    vault_client = VaultClient()
+    from vault_client import vault_client, VaultClientError
     VAULT_AVAILABLE = True
 except ImportError:
-    logging.warning("Vault client not available - THIS IS NOT SECURE FOR PRODUCTION")
+    logger.warning("Vault client not available - THIS IS NOT SECURE FOR PRODUCTION")
     VAULT_AVAILABLE = False
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-logger = logging.getLogger(__name__)
 
 @dataclass
 class PoolMonitoringStats:
@@ -36,25 +45,131 @@ class PoolMonitoringStats:
     failed_connections: int = 0
     avg_connection_time: float = 0.0
     max_connection_time: float = 0.0
+    # The same timings in milliseconds, rounded once when the snapshot is taken for reporting
+    avg_connection_time_ms: float = 0.0
+    max_connection_time_ms: float = 0.0
     last_health_check: Optional[datetime] = None
     pool_exhaustion_count: int = 0
-    
-# Global pool monitoring
-_pool_stats = PoolMonitoringStats()
 
-# Get secrets from Vault with fallback
-def get_secret(path, key=None):
-    """Get secret from Vault - NO FALLBACK FOR PRODUCTION SECURITY"""
+class _PoolCounter(IntEnum):
+    TOTAL_REQUESTS = 0
+    SUCCESSFUL_CONNECTIONS = 1
+    FAILED_CONNECTIONS = 2
+    POOL_EXHAUSTION_COUNT = 3
+
+class _PoolTiming(IntEnum):
+    AVG_CONNECTION_NS = 0
+    MAX_CONNECTION_NS = 1
+
+# Global pool monitoring. Counters are bumped on every acquire, so they live in flat typed
+# arrays rather than dataclass attributes; get_pool_stats() builds the snapshot on demand.
+_pool_counters = array.array('Q', [0] * len(_PoolCounter))
+_pool_timings = array.array('Q', [0] * len(_PoolTiming))  # nanoseconds
+_pool_last_health_check: Optional[datetime] = None
+
+def current_db_pool():
+    """Return the shared pool if it has been created, without creating or awaiting it"""
+    return _db_pool
+
+def _pool_gauge(name: str, documentation: str, read: Callable[[], float]) -> Gauge:
+    """Gauge evaluated when /metrics is scraped, so the request path never updates it"""
+    gauge = Gauge(name, documentation)
+    gauge.set_function(read)
+    return gauge
+
+def _pool_size(method: str) -> float:
+    pool = _db_pool
+    return getattr(pool, method)() if pool is not None else 0
+
+POOL_SIZE = _pool_gauge("db_pool_size", "Open database connections", lambda: _pool_size("get_size"))
+POOL_IDLE = _pool_gauge("db_pool_idle_connections", "Idle database connections", lambda: _pool_size("get_idle_size"))
+POOL_MAX_SIZE = _pool_gauge("db_pool_max_size", "Configured maximum pool size", lambda: _pool_size("get_max_size"))
+POOL_REQUESTS = _pool_gauge(
+    "db_pool_requests", "Connection requests made to the pool",
+    lambda: _pool_counters[_PoolCounter.TOTAL_REQUESTS],
+)
+POOL_FAILURES = _pool_gauge(
+    "db_pool_failed_connections", "Connection requests that failed",
+    lambda: _pool_counters[_PoolCounter.FAILED_CONNECTIONS],
+)
+POOL_EXHAUSTION = _pool_gauge(
+    "db_pool_exhaustion_events", "Times the pool was found at or near exhaustion",
+    lambda: _pool_counters[_PoolCounter.POOL_EXHAUSTION_COUNT],
+)
+POOL_AVG_ACQUIRE = _pool_gauge(
+    "db_pool_acquire_seconds_avg", "Moving average of connection acquisition time",
+    lambda: _pool_timings[_PoolTiming.AVG_CONNECTION_NS] / 1e9,
+)
+POOL_MAX_ACQUIRE = _pool_gauge(
+    "db_pool_acquire_seconds_max", "Slowest connection acquisition seen",
+    lambda: _pool_timings[_PoolTiming.MAX_CONNECTION_NS] / 1e9,
+)
+
+# Limited fallback only for non-security-critical settings
+def _fallback_secret_bundle(path):
+    """Build the environment fallback for a secret path (never includes the JWT secret key)"""
+    if path == 'database/config':
+        return {
+            'url': os.environ.get('DATABASE_URL', 'postgresql://postgres:password@db:5432/decentralized_id'),
+            'username': os.environ.get('DB_USERNAME', 'postgres'),
+            'password': os.environ.get('DB_PASSWORD', 'password'),
+            'host': os.environ.get('DB_HOST', 'db'),
+            'port': os.environ.get('DB_PORT', '5432'),
+            'database': os.environ.get('DB_NAME', 'decentralized_id'),
+        }
+    if path == 'auth/jwt':
+        return {
+            'algorithm': os.environ.get('JWT_ALGORITHM', 'HS256'),
+            'token_expire_minutes': int(os.environ.get('JWT_EXPIRE_MINUTES', '30')),
+            'refresh_token_expire_days': int(os.environ.get('JWT_REFRESH_EXPIRE_DAYS', '7')),
+        }
+    return {}
+
+# Resolved secrets and the settings derived from them are kept in-process for a while so
+# hot paths never wait on Vault; a rotation shows up after at most SECRET_CACHE_TTL seconds
+# (or immediately via invalidate_jwt_settings)
+SECRET_CACHE_TTL = int(os.environ.get('SECRET_CACHE_TTL', '300'))
+_secret_cache = TTLCache(maxsize=64, ttl=SECRET_CACHE_TTL)
+_secret_cache_lock = threading.Lock()
+_MISSING = object()
+
+def _cached_secret(cache_key, loader):
+    """Return a cached value, calling loader() to populate it on a miss"""
+    with _secret_cache_lock:
+        value = _secret_cache.get(cache_key, _MISSING)
+    if value is not _MISSING:
+        return value
+    value = loader()
+    with _secret_cache_lock:
+        _secret_cache[cache_key] = value
+    return value
+
+def get_secret_bundle(path):
+    """Get every key stored under a Vault path with a single request"""
+    return _cached_secret(('bundle', path), lambda: _load_secret_bundle(path))
+
+def _load_secret_bundle(path):
     if VAULT_AVAILABLE:
         try:
-            return vault_client.get_secret(path, key)
+            return vault_client.get_secret(path)
         except VaultClientError as e:
-            logger.error(f"Error fetching secret from Vault: {e}")
+            logger.error("Error fetching secret from Vault: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail="Vault connection required for secure operation. Please check Vault configuration."
             )
     
+    return _fallback_secret_bundle(path)
+
+# Get secrets from Vault with fallback
+def get_secret(path, key=None):
+    """Get secret from Vault - NO FALLBACK FOR PRODUCTION SECURITY"""
+    bundle = get_secret_bundle(path)
+    if key is None:
+        return bundle
+    if key in bundle:
+        return bundle[key]
+    
     # SECURITY: NO FALLBACK FOR JWT SECRETS IN PRODUCTION
     if path == 'auth/jwt' and key == 'secret_key':
         raise HTTPException(
@@ -62,28 +177,6 @@ def get_secret(path, key=None):
             detail="JWT secret key must be retrieved from Vault for security. Fallback secrets are not allowed."
         )
     
-    # Limited fallback only for non-security-critical settings
-    if path == 'database/config':
-        if key == 'url':
-            return os.environ.get('DATABASE_URL', 'postgresql://postgres:password@db:5432/decentralized_id')
-        elif key == 'username':
-            return os.environ.get('DB_USERNAME', 'postgres')
-        elif key == 'password':
-            return os.environ.get('DB_PASSWORD', 'password')
-        elif key == 'host':
-            return os.environ.get('DB_HOST', 'db')
-        elif key == 'port':
-            return os.environ.get('DB_PORT', '5432')
-        elif key == 'database':
-            return os.environ.get('DB_NAME', 'decentralized_id')
-    elif path == 'auth/jwt':
-        if key == 'algorithm':
-            return os.environ.get('JWT_ALGORITHM', 'HS256')
-        elif key == 'token_expire_minutes':
-            return int(os.environ.get('JWT_EXPIRE_MINUTES', '30'))
-        elif key == 'refresh_token_expire_days':
-            return int(os.environ.get('JWT_REFRESH_EXPIRE_DAYS', '7'))
-    
     raise HTTPException(
         status_code=500,
         detail=f"Failed to retrieve secret: {path}/{key} - Vault connection required"
@@ -92,11 +185,14 @@ def get_secret(path, key=None):
 # Constants from Vault
 def get_db_url():
     """Get database URL from Vault or environment"""
+    return _cached_secret('db_url', _load_db_url)
+
+def _load_db_url():
     if VAULT_AVAILABLE:
         try:
-            return vault_client.get_database_url()
-        except VaultClientError as e:
-            logger.error(f"Failed to get database URL from Vault: {str(e)}")
+            return vault_client.get_database_config()['url']
+        except (VaultClientError, KeyError) as e:
+            logger.error("Failed to get database URL from Vault: %s", e)
     
     # Fallback to environment variable
     return os.environ.get('DATABASE_URL', 'postgresql://postgres:VaultSecureDB2024@db:5432/decentralized_id')
@@ -105,9 +201,9 @@ def get_jwt_secret_key():
     """Get JWT secret key from Vault - NO FALLBACK FOR SECURITY"""
     if VAULT_AVAILABLE:
         try:
-            return vault_client.get_jwt_secret_key()
-        except VaultClientError as e:
-            logger.error(f"Failed to get JWT secret from Vault: {str(e)}")
+            return vault_client.get_jwt_config()['secret_key']
+        except (VaultClientError, KeyError) as e:
+            logger.error("Failed to get JWT secret from Vault: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail="JWT secret key must be retrieved from Vault for security"
@@ -140,188 +236,403 @@ def get_refresh_token_expire_days():
     except:
         return 7
 
+@dataclass(frozen=True, slots=True)
+class JwtSettings:
+    """JWT settings resolved once from auth/jwt; attributes are read on every sign/verify"""
+    secret_key: str = field(repr=False)
+    algorithm: str
+    # Pre-built allow-list handed to jwt.decode, so verification doesn't build a list per call
+    algorithms: tuple
+    token_expire_minutes: int
+    refresh_token_expire_days: int
+    token_expire_seconds: int
+    refresh_token_expire_seconds: int
+    # Sign/verify functions already bound to the key and algorithm (see _build_token_codec)
+    encode: Callable[[dict], str] = field(repr=False, compare=False)
+    decode: Callable[..., dict] = field(repr=False, compare=False)
+
+def get_jwt_settings() -> JwtSettings:
+    """Resolve JWT settings from one read of auth/jwt and keep them in memory for the hot path"""
+    return _cached_secret('jwt_settings', _load_jwt_settings)
+
+def _load_jwt_settings() -> JwtSettings:
+    try:
+        jwt_config = get_secret_bundle('auth/jwt')
+    except HTTPException:
+        jwt_config = _fallback_secret_bundle('auth/jwt')
+    
+    # SECURITY: the secret key itself is never taken from the fallback bundle
+    secret_key = jwt_config.get('secret_key') or get_jwt_secret_key()
+    token_expire_minutes = int(jwt_config.get('token_expire_minutes', 30))
+    refresh_token_expire_days = int(jwt_config.get('refresh_token_expire_days', 7))
+    algorithm = jwt_config.get('algorithm', 'HS256')
+    algorithms = (algorithm,)
+    if algorithm != 'HS256':
+        logger.warning("JWT algorithm %s is signed and verified through PyJWT; HS256 uses the faster pre-keyed HMAC path", algorithm)
+    elif len(secret_key.encode()) < 32:
+        # RFC 7518 3.2: HS256 keys must be at least as long as the 256-bit hash output
+        logger.warning("JWT secret is shorter than 32 bytes; use at least 256 bits of randomness for HS256")
+    encode, decode = _build_token_codec(secret_key, algorithm, algorithms)
+    return JwtSettings(
+        secret_key=secret_key,
+        algorithm=algorithm,
+        algorithms=algorithms,
+        token_expire_minutes=token_expire_minutes,
+        refresh_token_expire_days=refresh_token_expire_days,
+        token_expire_seconds=token_expire_minutes * 60,
+        refresh_token_expire_seconds=refresh_token_expire_days * 86400,
+        encode=encode,
+        decode=decode,
+    )
+
+def invalidate_jwt_settings():
+    """Drop cached JWT/database settings so the next call re-reads Vault (e.g. after rotation)"""
+    with _secret_cache_lock:
+        _secret_cache.clear()
+    with _verified_tokens_lock:
+        _verified_tokens.clear()
+    if VAULT_AVAILABLE:
+        vault_client.clear_cache('auth/jwt')
+        vault_client.clear_cache('database/config')
+
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New passwords are hashed with Argon2id (argon2-cffi calls into native libargon2)
+password_hasher = PasswordHasher(
+    time_cost=int(os.environ.get('ARGON2_TIME_COST', '3')),
+    memory_cost=int(os.environ.get('ARGON2_MEMORY_COST', '65536')),  # KiB
+    parallelism=int(os.environ.get('ARGON2_PARALLELISM', '4')),
+    type=Argon2Type.ID,
+)
+
+@functools.lru_cache(maxsize=1)
+def _dummy_password_hash():
+    """Argon2 hash of a random secret, verified against when no account matches the email"""
+    return password_hasher.hash(secrets.token_urlsafe(32))
+
+def warm_password_hasher():
+    """Compute the dummy hash ahead of the first request (blocking; run in a thread)"""
+    _dummy_password_hash()
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 # Global connection pool (reuse across requests)
 _db_pool = None
+_db_pool_lock = asyncio.Lock()
 _redis_client = None
+_redis_lock = asyncio.Lock()
+
+def _default_pool_bounds():
+    """
+    Derive pool bounds from the connection budget shared by every process of the service.
+
+    Each uvicorn worker (and each replica) has its own pool, so the Postgres connection cap
+    is split between DB_POOL_PROCESSES of them; beyond ~25 connections per pool extra
+    connections stop adding throughput.
+    """
+    max_connections = int(os.environ.get('MAX_DB_CONNECTIONS', '100'))
+    utilization = float(os.environ.get('POOL_UTILIZATION_TARGET', '0.8'))
+    processes = max(1, int(os.environ.get('DB_POOL_PROCESSES', os.environ.get('WEB_CONCURRENCY', '1'))))
+    max_size = max(2, min(25, int(max_connections * utilization) // processes))
+    min_size = min(max(2, os.cpu_count() or 1), max_size)
+    return min_size, max_size
+
+def get_db_pool_settings():
+    """Get connection pool sizing from the database/config secret or environment"""
+    try:
+        db_config = get_secret_bundle('database/config')
+    except HTTPException:
+        db_config = {}
+    default_min, default_max = _default_pool_bounds()
+    return {
+        "min_size": int(db_config.get('pool_min_size', os.environ.get('DB_POOL_MIN_SIZE', default_min))),
+        "max_size": int(db_config.get('pool_max_size', os.environ.get('DB_POOL_MAX_SIZE', default_max))),
+        "command_timeout": float(os.environ.get('DB_COMMAND_TIMEOUT', '30')),
+        "max_inactive_connection_lifetime": float(os.environ.get('DB_MAX_INACTIVE_CONNECTION_LIFETIME', '300')),
+    }
+
+# Longest a request waits for a pooled connection; an exhausted pool then sheds load with a
+# 503 instead of queueing requests behind it
+DB_ACQUIRE_TIMEOUT = float(os.environ.get('DB_ACQUIRE_TIMEOUT', '2.0'))  # seconds
+
+def pool_busy_error() -> HTTPException:
+    """503 raised when no pooled connection frees up within DB_ACQUIRE_TIMEOUT"""
+    _pool_counters[_PoolCounter.POOL_EXHAUSTION_COUNT] += 1
+    return HTTPException(
+        status_code=503,
+        detail="Service temporarily unavailable - high load",
+        headers={"Retry-After": "1"},
+    )
+
+# Hot-path statement text, shared with the handlers so it hits the same cache entry
+USER_BY_EMAIL_QUERY = "SELECT id, email, password_hash FROM users WHERE email = $1"
+PING_QUERY = "SELECT 1"
 
 async def get_db_pool():
     """Get or create database connection pool with enhanced monitoring"""
-    global _db_pool, _pool_stats
-    if _db_pool is None:
-        try:
-            _db_pool = await asyncpg.create_pool(
-                get_db_url(),
-                min_size=10,  # Increased minimum connections
-                max_size=50,  # Increased maximum connections
-                command_timeout=30,  # Reduced timeout
-                server_settings={
-                    'application_name': 'auth_service',
-                    'tcp_keepalives_idle': '600',
-                    'tcp_keepalives_interval': '30',
-                    'tcp_keepalives_count': '3',
-                },
-                max_inactive_connection_lifetime=300,  # 5 minutes
-                # Enhanced monitoring callbacks
-                setup=_setup_connection,
-                init=_init_connection
-            )
-            logger.info(f"Database pool created: min=10, max=50")
+    global _db_pool
+    if _db_pool is not None:
+        return _db_pool
+    
+    # Concurrent cold-start requests must not each create (and leak) a pool
+    async with _db_pool_lock:
+        if _db_pool is None:
+            try:
+                # Vault reads block, so resolve connection settings in a worker thread
+                pool_settings = await asyncio.to_thread(get_db_pool_settings)
+                db_url = await asyncio.to_thread(get_db_url)
+                _db_pool = await asyncpg.create_pool(
+                    db_url,
+                    min_size=pool_settings["min_size"],
+                    max_size=pool_settings["max_size"],
+                    command_timeout=pool_settings["command_timeout"],
+                    # Keep the prepared plans of the hot auth queries (user lookup/insert) cached per
+                    # connection for its whole lifetime. Assumes no DDL churn on these tables while
+                    # the service runs; asyncpg re-prepares on InvalidCachedStatementError anyway.
+                    statement_cache_size=1024,
+                    max_cached_statement_lifetime=0,
+                    max_cacheable_statement_size=0,
+                    server_settings={
+                        'application_name': 'auth_service',
+                        'tcp_keepalives_idle': '600',
+                        'tcp_keepalives_interval': '30',
+                        'tcp_keepalives_count': '3',
+                        # Sent in the startup packet instead of a SET per connection
+                        'timezone': 'UTC',
+                        'statement_timeout': '30s',
+                    },
+                    max_inactive_connection_lifetime=pool_settings["max_inactive_connection_lifetime"],
+                    # Enhanced monitoring callbacks
+                    setup=_setup_connection,
+                    init=_init_connection
+                )
+                logger.info(
+                    "Database pool created: min=%s, max=%s, command_timeout=%ss, max_inactive_lifetime=%ss",
+                    pool_settings['min_size'], pool_settings['max_size'],
+                    pool_settings['command_timeout'], pool_settings['max_inactive_connection_lifetime']
+                )
             
-            # Start pool monitoring task
-            asyncio.create_task(_monitor_pool_health())
+                # Start pool monitoring task
+                asyncio.create_task(_monitor_pool_health(_db_pool))
             
-        except Exception as e:
-            logger.error(f"Failed to create database pool: {e}")
-            _pool_stats.failed_connections += 1
-            raise HTTPException(status_code=500, detail="Database connection failed")
+            except Exception as e:
+                logger.error("Failed to create database pool: %s", e)
+                _pool_counters[_PoolCounter.FAILED_CONNECTIONS] += 1
+                raise HTTPException(status_code=500, detail="Database connection failed")
     
     return _db_pool
 
+async def close_db_pool():
+    """Close the shared database pool (application shutdown)"""
+    global _db_pool
+    if _db_pool is not None:
+        pool, _db_pool = _db_pool, None
+        await pool.close()
+        logger.info("Database pool closed")
+
 async def _setup_connection(conn):
-    """Setup callback for new connections"""
-    await conn.execute("SET timezone = 'UTC'")
-    await conn.execute("SET statement_timeout = '30s'")
+    """Setup callback, run by asyncpg on each connection acquisition"""
+    _pool_counters[_PoolCounter.SUCCESSFUL_CONNECTIONS] += 1
 
 async def _init_connection(conn):
-    """Initialize callback for each connection acquisition"""
-    _pool_stats.successful_connections += 1
+    """Init callback, run once per new connection: prime its statement cache"""
+    # Running each hot statement once puts its plan in asyncpg's statement cache, so the
+    # first login or health probe on this connection skips the Parse/Describe round trip
+    await conn.fetchrow(USER_BY_EMAIL_QUERY, "")
+    await conn.fetchval(PING_QUERY)
 
-async def _monitor_pool_health():
-    """Background task to monitor pool health"""
-    global _db_pool, _pool_stats
+async def _monitor_pool_health(pool):
+    """Background task to monitor pool health; exits once this pool is closed or replaced"""
+    global _pool_last_health_check
+    last_logged = None  # time.monotonic() of the last health log
+    last_total_requests = None
     
     while True:
         try:
             await asyncio.sleep(60)  # Check every minute
             
-            if _db_pool is None:
-                continue
+            if _db_pool is not pool:
+                return
             
-            # Log pool statistics
-            pool_size = _db_pool.get_size()
-            idle_size = _db_pool.get_idle_size()
-            used_connections = pool_size - idle_size
+            pool_size = pool.get_size()
+            idle_size = pool.get_idle_size()
+            near_exhaustion = idle_size == 0 and pool_size >= 0.9 * pool.get_max_size()  # 90% of max pool size
+            if near_exhaustion:
+                _pool_counters[_PoolCounter.POOL_EXHAUSTION_COUNT] += 1
             
-            # Check for pool exhaustion
-            if idle_size == 0 and pool_size >= 45:  # 90% of max pool size
-                _pool_stats.pool_exhaustion_count += 1
-                logger.warning(f"Database pool near exhaustion: {used_connections}/{pool_size} connections in use")
+            stats = get_pool_stats()
+            success_rate = stats.successful_connections / stats.total_requests if stats.total_requests else 1.0
+            poor_success_rate = success_rate < 0.95  # Less than 95% success rate
             
-            # Log health metrics every 5 minutes
-            now = datetime.now(timezone.utc)
-            if (_pool_stats.last_health_check is None or 
-                (now - _pool_stats.last_health_check).total_seconds() >= 300):
-                
-                _pool_stats.last_health_check = now
-                logger.info(f"Pool Health - Size: {pool_size}, Idle: {idle_size}, "
-                          f"Success Rate: {_pool_stats.successful_connections}/{_pool_stats.total_requests}, "
-                          f"Exhaustion Events: {_pool_stats.pool_exhaustion_count}")
-                
-                # Alert if pool performance is poor
-                if _pool_stats.total_requests > 0:
-                    success_rate = _pool_stats.successful_connections / _pool_stats.total_requests
-                    if success_rate < 0.95:  # Less than 95% success rate
-                        logger.warning(f"Poor database pool performance: {success_rate:.2%} success rate")
+            # Report every 5 minutes, and only if the pool saw traffic since the last report;
+            # anything abnormal is reported on the tick it is seen
+            now = time.monotonic()
+            due = last_logged is None or now - last_logged >= 300
+            if not (near_exhaustion or poor_success_rate or (due and stats.total_requests != last_total_requests)):
+                continue
+            
+            last_logged = now
+            last_total_requests = stats.total_requests
+            # Wall-clock timestamp only for reporting in /metrics/pool
+            _pool_last_health_check = datetime.now(timezone.utc)
+            metrics = {
+                "pool_size": pool_size,
+                "pool_idle": idle_size,
+                "pool_used": pool_size - idle_size,
+                "total_requests": stats.total_requests,
+                "successful_connections": stats.successful_connections,
+                "failed_connections": stats.failed_connections,
+                "success_rate": round(success_rate, 4),
+                "pool_exhaustion_count": stats.pool_exhaustion_count,
+            }
+            level = logging.WARNING if near_exhaustion or poor_success_rate else logging.DEBUG
+            logger.log(
+                level,
+                "Pool health: size=%s idle=%s requests=%s success_rate=%.2f%% exhaustion_events=%s",
+                pool_size, idle_size, stats.total_requests, success_rate * 100, stats.pool_exhaustion_count,
+                extra={"pool_metrics": metrics},
+            )
                         
         except Exception as e:
-            logger.error(f"Pool monitoring error: {e}")
+            logger.error("Pool monitoring error: %s", e)
 
 async def get_redis():
     """Get or create Redis connection"""
     global _redis_client
-    if _redis_client is None:
-        try:
-            import redis.asyncio as redis
-            redis_url = os.environ.get('REDIS_URL', 'redis://redis:6379')
-            _redis_client = redis.from_url(
-                redis_url,
-                max_connections=20,
-                retry_on_timeout=True,
-                socket_keepalive=True,
-                health_check_interval=30
-            )
-            # Test connection
-            await _redis_client.ping()
-            logger.info("Redis connection established")
-        except Exception as e:
-            logger.warning(f"Redis connection failed: {e}")
-            _redis_client = None
+    if _redis_client is not None:
+        return _redis_client
+    
+    async with _redis_lock:
+        if _redis_client is None:
+            try:
+                import redis.asyncio as redis
+                redis_url = os.environ.get('REDIS_URL', 'redis://redis:6379')
+                client = redis.from_url(
+                    redis_url,
+                    max_connections=20,
+                    retry_on_timeout=True,
+                    socket_keepalive=True,
+                    health_check_interval=30
+                )
+                # Test connection before publishing the client to other callers
+                await client.ping()
+                _redis_client = client
+                logger.info("Redis connection established")
+            except Exception as e:
+                logger.warning("Redis connection failed: %s", e)
     
     return _redis_client
 
 # Database connection with pool reuse and monitoring
 async def get_db_connection():
     """Get database connection from pool with monitoring"""
-    global _pool_stats
-    start_time = time.time()
-    _pool_stats.total_requests += 1
+    start_ns = time.perf_counter_ns()
+    _pool_counters[_PoolCounter.TOTAL_REQUESTS] += 1
     
     try:
         pool = await get_db_pool()
         if not pool:
-            _pool_stats.failed_connections += 1
+            _pool_counters[_PoolCounter.FAILED_CONNECTIONS] += 1
             raise HTTPException(status_code=500, detail="Database pool not available")
         
         # Monitor connection acquisition time
-        async with pool.acquire() as conn:
-            connection_time = time.time() - start_time
+        async with pool.acquire(timeout=DB_ACQUIRE_TIMEOUT) as conn:
+            connection_ns = time.perf_counter_ns() - start_ns
             
-            # Update timing statistics
-            if connection_time > _pool_stats.max_connection_time:
-                _pool_stats.max_connection_time = connection_time
+            # Update timing statistics (integer nanoseconds; converted only for reporting)
+            timings = _pool_timings
+            if connection_ns > timings[_PoolTiming.MAX_CONNECTION_NS]:
+                timings[_PoolTiming.MAX_CONNECTION_NS] = connection_ns
                 
             # Update running average
-            if _pool_stats.avg_connection_time == 0:
-                _pool_stats.avg_connection_time = connection_time
+            if timings[_PoolTiming.AVG_CONNECTION_NS] == 0:
+                timings[_PoolTiming.AVG_CONNECTION_NS] = connection_ns
             else:
-                _pool_stats.avg_connection_time = (
-                    _pool_stats.avg_connection_time * 0.9 + connection_time * 0.1
-                )
+                timings[_PoolTiming.AVG_CONNECTION_NS] = (
+                    timings[_PoolTiming.AVG_CONNECTION_NS] * 9 + connection_ns
+                ) // 10
             
             # Alert on slow connections
-            if connection_time > 5.0:  # More than 5 seconds
-                logger.warning(f"Slow database connection acquisition: {connection_time:.2f}s")
+            if connection_ns > 5_000_000_000:  # More than 5 seconds
+                logger.warning("Slow database connection acquisition: %.2fs", connection_ns / 1e9)
             
             yield conn
             
     except asyncpg.InvalidPasswordError:
-        _pool_stats.failed_connections += 1
+        _pool_counters[_PoolCounter.FAILED_CONNECTIONS] += 1
         logger.error("Database authentication failed")
         raise HTTPException(status_code=500, detail="Database authentication failed")
+    except asyncio.TimeoutError:
+        _pool_counters[_PoolCounter.FAILED_CONNECTIONS] += 1
+        logger.error("Timed out waiting %.1fs for a database connection", DB_ACQUIRE_TIMEOUT)
+        raise pool_busy_error()
     except asyncpg.TooManyConnectionsError:
-        _pool_stats.failed_connections += 1
-        _pool_stats.pool_exhaustion_count += 1
+        _pool_counters[_PoolCounter.FAILED_CONNECTIONS] += 1
+        _pool_counters[_PoolCounter.POOL_EXHAUSTION_COUNT] += 1
         logger.error("Database pool exhausted - too many connections")
         raise HTTPException(status_code=503, detail="Service temporarily unavailable - high load")
     except Exception as e:
-        _pool_stats.failed_connections += 1
-        logger.error(f"Database connection error: {str(e)}")
+        _pool_counters[_PoolCounter.FAILED_CONNECTIONS] += 1
+        logger.error("Database connection error: %s", e)
         raise HTTPException(status_code=500, detail="Database connection error")
 
-def get_pool_stats():
-    """Get current pool monitoring statistics"""
-    return _pool_stats
+def get_pool_stats() -> PoolMonitoringStats:
+    """Get a snapshot of the current pool monitoring statistics"""
+    return PoolMonitoringStats(
+        total_requests=_pool_counters[_PoolCounter.TOTAL_REQUESTS],
+        successful_connections=_pool_counters[_PoolCounter.SUCCESSFUL_CONNECTIONS],
+        failed_connections=_pool_counters[_PoolCounter.FAILED_CONNECTIONS],
+        avg_connection_time=_pool_timings[_PoolTiming.AVG_CONNECTION_NS] / 1e9,
+        max_connection_time=_pool_timings[_PoolTiming.MAX_CONNECTION_NS] / 1e9,
+        avg_connection_time_ms=round(_pool_timings[_PoolTiming.AVG_CONNECTION_NS] / 1e6, 2),
+        max_connection_time_ms=round(_pool_timings[_PoolTiming.MAX_CONNECTION_NS] / 1e6, 2),
+        last_health_check=_pool_last_health_check,
+        pool_exhaustion_count=_pool_counters[_PoolCounter.POOL_EXHAUSTION_COUNT],
+    )
 
 # JWT token functions
+def _build_token_codec(secret_key: str, algorithm: str, algorithms: tuple):
+    """
+    Bind sign/verify to one key and algorithm, once per settings load.
+
+    HS256 goes through the pre-keyed HMAC codec; any other algorithm falls back to PyJWT
+    with the key and the accepted-algorithms tuple fixed up front.
+    """
+    if algorithm == "HS256":
+        codec = HS256Codec(secret_key)
+        required = tuple(_JWT_DECODE_OPTIONS["require"])
+
+        def decode(token: str, verify_exp: bool = True) -> dict:
+            return codec.decode(token, require=required, verify_exp=verify_exp)
+
+        return codec.encode, decode
+
+    def encode(claims: dict) -> str:
+        return jwt.encode(claims, secret_key, algorithm=algorithm)
+
+    def decode(token: str, verify_exp: bool = True) -> dict:
+        options = _JWT_DECODE_OPTIONS if verify_exp else {**_JWT_DECODE_OPTIONS, "verify_exp": False}
+        return _jwt_decoder.decode(token, secret_key, algorithms=algorithms, options=options)
+
+    return encode, decode
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    settings = get_jwt_settings()
     to_encode = data.copy()
+    # Integer epoch seconds are what ends up in the token; skip building datetimes
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = int(time.time() + expires_delta.total_seconds())
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=get_token_expire_minutes())
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, get_jwt_secret_key(), algorithm=get_jwt_algorithm())
+        expire = int(time.time()) + settings.token_expire_seconds
+    to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
+    encoded_jwt = settings.encode(to_encode)
     return encoded_jwt
 
 def create_refresh_token(data: dict):
+    settings = get_jwt_settings()
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(days=get_refresh_token_expire_days())
-    to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, get_jwt_secret_key(), algorithm=get_jwt_algorithm())
+    expire = int(time.time()) + settings.refresh_token_expire_seconds
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
+    encoded_jwt = settings.encode(to_encode)
     return encoded_jwt
 
 def create_tokens(data: dict):
@@ -330,7 +641,7 @@ def create_tokens(data: dict):
     
     access_token = create_access_token(data)
     refresh_token = create_refresh_token(data)
-    expires_in = get_token_expire_minutes() * 60  # Convert to seconds
+    expires_in = get_jwt_settings().token_expire_seconds
     
     return Token(
         access_token=access_token,
@@ -339,58 +650,240 @@ def create_tokens(data: dict):
         expires_in=expires_in
     )
 
-def verify_token(token: str):
+# Claims every token we issue must carry; enforced while decoding
+_JWT_DECODE_OPTIONS = {"require": ["exp", "sub"]}
+
+# Recently verified tokens -> decoded payload, so repeated bearer tokens skip decoding.
+# Entries are keyed by a 16-byte digest rather than the token itself and never outlive
+# the token's own exp.
+_VERIFY_CACHE_TTL = int(os.environ.get('JWT_VERIFY_CACHE_TTL', '60'))
+_verified_tokens = TLRUCache(
+    maxsize=10_000,
+    ttu=lambda _key, payload, now: min(now + _VERIFY_CACHE_TTL, payload["exp"]),
+    timer=time.time,
+)
+_verified_tokens_lock = threading.Lock()
+_jwt_decoder = OrjsonPyJWT()
+
+_MAX_TOKEN_LENGTH = 8192
+
+def _token_fingerprint(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _decode_token(token: str):
+    """Decode and verify a JWT, reusing the payload of a recently verified identical token"""
+    # Cheap shape check first so random blobs never reach base64/HMAC; every compact JWT
+    # starts with the base64 of '{"' ("eyJ")
+    if not token or len(token) > _MAX_TOKEN_LENGTH or not token.startswith("eyJ") or token.count(".") != 2:
+        raise jwt.DecodeError("Malformed token")
+    fingerprint = _token_fingerprint(token)
+    with _verified_tokens_lock:
+        payload = _verified_tokens.get(fingerprint)
+    if payload is not None:
+        return payload
+    
+    payload = get_jwt_settings().decode(token)
+    with _verified_tokens_lock:
+        _verified_tokens[fingerprint] = payload
+    return payload
+
+def _forget_verified_token(token: str):
+    """Evict a token from the verification cache (on revocation)"""
+    with _verified_tokens_lock:
+        _verified_tokens.pop(_token_fingerprint(token), None)
+
+def _verify_access_payload(token: str) -> dict:
     try:
-        payload = jwt.decode(token, get_jwt_secret_key(), algorithms=[get_jwt_algorithm()])
-        username: str = payload.get("sub")
-        if username is None:
+        payload = _decode_token(token)
+        # Access tokens issued before the type claim was added carry no type
+        if payload.get("type", "access") != "access":
             raise HTTPException(status_code=401, detail="Invalid token")
-        return username
-    except JWTError:
+        return payload
+    except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def verify_token(token: str):
+    return _verify_access_payload(token)["sub"]
+
 async def verify_refresh_token(token: str):
     try:
-        payload = jwt.decode(token, get_jwt_secret_key(), algorithms=[get_jwt_algorithm()])
-        username: str = payload.get("sub")
-        token_type: str = payload.get("type")
-        if username is None or token_type != "refresh":
+        payload = _decode_token(token)
+        if payload.get("type") != "refresh":
             raise HTTPException(status_code=401, detail="Invalid refresh token")
-        return payload
-    except JWTError:
+    except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
+    # Refresh tokens are revoked on rotation; a replayed one must not mint a new pair
+    await _ensure_not_revoked(payload, token)
+    return dict(payload)
+
+# Process-local mirror of revoked token ids; each entry expires with the token it revokes,
+# so memory stays bounded and nothing has to be swept. Redis stays the source of truth
+# shared between workers.
+# When full, the least recently used entry is dropped; Redis still has it.
+revoked_tokens = TLRUCache(
+    maxsize=int(os.environ.get('REVOKED_TOKENS_CACHE_SIZE', '100000')),
+    ttu=lambda _jti, exp, _now: exp,
+    timer=time.time,
+)
+_revoked_tokens_lock = threading.Lock()
+
+def _revocation_id(payload: dict, token: str) -> str:
+    """Identify a token by its jti, falling back to a digest for tokens issued without one"""
+    jti = payload.get("jti")
+    if jti:
+        return jti
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+_REVOKED_PREFIX = b"revoked_token:"
+
+def _revocation_key(revocation_id: str) -> bytes:
+    """Redis key for a revoked token, built as bytes so redis-py sends it without re-encoding"""
+    return _REVOKED_PREFIX + revocation_id.encode()
+
+def _remember_revoked(revocation_id: str, exp: float):
+    with _revoked_tokens_lock:
+        revoked_tokens[revocation_id] = exp
+
+def _is_locally_revoked(revocation_id: str) -> bool:
+    with _revoked_tokens_lock:
+        return revocation_id in revoked_tokens
+
+# Revocations are broadcast on this channel as b"<revocation id> <exp>" so every worker's
+# mirror learns about them without polling Redis
+_REVOKED_CHANNEL = b"revoked_tokens"
+
+# True while the mirror holds every live revocation: primed from Redis and kept current by
+# the pub/sub listener. Only then may a local miss skip the Redis round trip.
+_revocation_mirror_synced = False
+
+def _mirror_is_authoritative() -> bool:
+    # Once the mirror is full it starts dropping entries, so misses are no longer conclusive
+    return _revocation_mirror_synced and revoked_tokens.currsize < revoked_tokens.maxsize
+
+def _apply_revocation_message(data: bytes):
+    try:
+        revocation_id, _, exp = data.decode().partition(" ")
+        exp = float(exp)
+    except ValueError:
+        logger.warning("Ignoring malformed revocation message: %r", data)
+        return
+    # Same bound revoke_token applies, so one bad publisher cannot pin mirror entries forever
+    _remember_revoked(revocation_id, min(exp, time.time() + get_jwt_settings().refresh_token_expire_seconds))
+
+async def _prime_revoked_tokens(redis_client):
+    """Load every revocation currently in Redis into the local mirror"""
+    keys = [key async for key in redis_client.scan_iter(match=_REVOKED_PREFIX + b"*", count=1000)]
+    for start in range(0, len(keys), 1000):
+        batch = keys[start:start + 1000]
+        now = time.time()
+        for key, exp in zip(batch, await redis_client.mget(batch)):
+            if exp is None:
+                continue  # expired since the scan
+            exp = float(exp)
+            if exp <= now:
+                # Revoked before the value carried the expiry; the key's TTL still does
+                exp = now + await redis_client.ttl(key)
+            _remember_revoked(key[len(_REVOKED_PREFIX):].decode(), exp)
+
+async def sync_revoked_tokens():
+    """
+    Keep the revocation mirror in step with Redis for the life of the process.
+
+    Subscribes before priming, so a revocation published in between is applied twice rather
+    than missed. Whenever the subscription drops, lookups fall back to Redis until it is
+    re-established and the mirror re-primed.
+    """
+    global _revocation_mirror_synced
+    while True:
+        redis_client = await get_redis()
+        if redis_client is None:
+            await asyncio.sleep(5)
+            continue
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(_REVOKED_CHANNEL)
+            await _prime_revoked_tokens(redis_client)
+            _revocation_mirror_synced = True
+            logger.info("Revocation mirror primed with %d tokens", revoked_tokens.currsize)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    _apply_revocation_message(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Revocation sync interrupted: %s", e)
+        finally:
+            _revocation_mirror_synced = False
+            await pubsub.aclose()
+        await asyncio.sleep(1)
+
+async def _ensure_not_revoked(payload: dict, token: str):
+    """Raise 401 if the token's jti is revoked, checking the local mirror before Redis"""
+    revocation_id = _revocation_id(payload, token)
+    if _is_locally_revoked(revocation_id):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    if _mirror_is_authoritative():
+        return
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Get current user and check if token is revoked using Redis"""
-    # Check if token is revoked using Redis
     redis_client = await get_redis()
     if redis_client:
         try:
-            is_revoked = await redis_client.get(f"revoked_token:{token}")
-            if is_revoked:
-                raise HTTPException(status_code=401, detail="Token has been revoked")
+            is_revoked = await redis_client.exists(_revocation_key(revocation_id))
         except Exception as e:
-            logger.warning(f"Redis token check failed: {e}")
             # Continue without Redis check if Redis is unavailable
+            logger.warning("Redis token check failed: %s", e)
+            is_revoked = False
+        if is_revoked:
+            _remember_revoked(revocation_id, payload["exp"])
+            raise HTTPException(status_code=401, detail="Token has been revoked")
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)):
+    """Get current user and check if token is revoked using Redis"""
+    # Already resolved earlier in this request: skip the HMAC and the Redis round trip
+    username = getattr(request.state, "user", None)
+    if username is not None:
+        return username
     
-    username = verify_token(token)
-    return username
+    payload = _verify_access_payload(token)
+    await _ensure_not_revoked(payload, token)
+    request.state.user = payload["sub"]
+    return payload["sub"]
 
 async def revoke_token(token: str):
     """Add token to revoked tokens list using Redis"""
+    settings = get_jwt_settings()
+    try:
+        # The token may come from a request body rather than the authenticated bearer, so
+        # only tokens we signed are revoked; an expired one is accepted and is a no-op below
+        payload = settings.decode(token, verify_exp=False)
+    except jwt.InvalidSignatureError:
+        raise HTTPException(status_code=400, detail="Invalid token signature")
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=400, detail="Malformed token")
+    # No token we issue outlives a refresh token, so neither may its revocation
+    now = time.time()
+    exp = min(payload["exp"], now + settings.refresh_token_expire_seconds)
+    ttl = int(exp - now)
+    _forget_verified_token(token)
+    if ttl <= 0:
+        # Already expired, nothing left to revoke
+        return
+
+    revocation_id = _revocation_id(payload, token)
+    _remember_revoked(revocation_id, exp)
     redis_client = await get_redis()
     if redis_client:
         try:
-            # Store revoked token with expiration matching token expiration
-            expire_minutes = get_token_expire_minutes()
-            await redis_client.setex(
-                f"revoked_token:{token}", 
-                expire_minutes * 60,  # Convert to seconds
-                "revoked"
-            )
-            logger.info("Token revoked and stored in Redis")
+            # Keep the revocation only as long as the token itself would stay valid; the value
+            # is the expiry so other workers can prime their mirrors from it. Stored and
+            # broadcast in one MULTI, so no synced worker can miss a stored revocation.
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.setex(_revocation_key(revocation_id), ttl, int(exp))
+                pipe.publish(_REVOKED_CHANNEL, f"{revocation_id} {int(exp)}")
+                await pipe.execute()
+            logger.debug("Token revoked and stored in Redis")
         except Exception as e:
-            logger.error(f"Failed to revoke token in Redis: {e}")
+            logger.error("Failed to revoke token in Redis: %s", e)
             raise HTTPException(
                 status_code=500, 
                 detail="Failed to revoke token securely"
@@ -403,26 +896,135 @@ async def revoke_token(token: str):
         )
 
 # Password utilities
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+def _verify_password_sync(plain_password, hashed_password):
+    if hashed_password is None:
+        # Unknown account: do the same Argon2 work so the response time doesn't reveal it
+        _verify_password_sync(plain_password, _dummy_password_hash())
+        return False
+    if hashed_password.startswith("$argon2"):
+        try:
+            return password_hasher.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
+    # Accounts created before the Argon2 switch still carry bcrypt hashes; checked with the
+    # bcrypt module directly, there is only the one legacy scheme to identify
+    try:
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    except ValueError:
+        # Neither Argon2 nor bcrypt: never matches
+        return False
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+def _get_password_hash_sync(password):
+    return password_hasher.hash(password)
+
+def password_needs_rehash(hashed_password):
+    """True for legacy bcrypt hashes and Argon2 hashes made with outdated parameters"""
+    if not hashed_password.startswith("$argon2"):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password)
+
+# Password hashing is deliberately slow CPU work. Both libargon2 and bcrypt release the GIL,
+# so a dedicated thread pool sized to the cores hashes in parallel without the IPC and
+# pickling a process pool would add, and without competing with the default executor
+# that serves sync dependencies and Vault reads.
+_hash_executor: Optional[ThreadPoolExecutor] = None
+# Hashes admitted at once (running plus queued); past this, callers get 503 rather than
+# waiting behind an ever longer executor queue
+_hash_capacity = 0
+_hashes_in_flight = 0
+
+def _default_hash_workers():
+    # Every uvicorn worker on the host has its own pool; together they should cover the
+    # cores once, which also caps Argon2 memory at cores x ARGON2_MEMORY_COST
+    processes = max(1, int(os.environ.get('WEB_CONCURRENCY', '1')))
+    return max(1, (os.cpu_count() or 1) // processes)
+
+def start_hash_executor():
+    global _hash_executor, _hash_capacity
+    if _hash_executor is None:
+        workers = int(os.environ.get('PASSWORD_HASH_WORKERS', _default_hash_workers()))
+        _hash_capacity = int(os.environ.get('PASSWORD_HASH_CAPACITY', workers * 2))
+        _hash_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    return _hash_executor
+
+def shutdown_hash_executor():
+    global _hash_executor
+    if _hash_executor is not None:
+        executor, _hash_executor = _hash_executor, None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+async def _run_hash(func, *args):
+    global _hashes_in_flight
+    executor = _hash_executor or start_hash_executor()
+    if _hashes_in_flight >= _hash_capacity:
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _hashes_in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    finally:
+        _hashes_in_flight -= 1
+
+async def verify_password(plain_password, hashed_password):
+    return await _run_hash(_verify_password_sync, plain_password, hashed_password)
+
+async def get_password_hash(password):
+    return await _run_hash(_get_password_hash_sync, password)
 
 # Health check function
-async def health_check():
+HEALTH_CHECK_ACQUIRE_TIMEOUT = 2.0  # seconds
+_JWT_SELF_TEST_TTL = 60  # seconds
+_jwt_self_test: Optional[Dict] = None
+_jwt_self_test_settings: Optional[JwtSettings] = None
+_jwt_self_test_at = 0.0
+
+def _check_jwt_health() -> Dict:
+    """
+    Sign and verify a test token once per settings generation.
+
+    The result is reused for up to a minute and re-run as soon as the cached settings
+    change (rotation/invalidation), so probes neither hit Vault nor compute HMACs.
+    """
+    global _jwt_self_test, _jwt_self_test_settings, _jwt_self_test_at
+    try:
+        settings = get_jwt_settings()
+    except Exception as e:
+        return {"status": "unhealthy", "error": str(e)}
+    
+    now = time.monotonic()
+    if (_jwt_self_test is not None and _jwt_self_test_settings is settings
+            and now - _jwt_self_test_at < _JWT_SELF_TEST_TTL):
+        return _jwt_self_test
+    
+    try:
+        test_token = create_access_token({"sub": "health_check"})
+        verify_token(test_token)
+        _forget_verified_token(test_token)
+        _jwt_self_test = {"status": "healthy"}
+    except Exception as e:
+        _jwt_self_test = {"status": "unhealthy", "error": str(e)}
+    _jwt_self_test_settings = settings
+    _jwt_self_test_at = now
+    return _jwt_self_test
+
+async def health_check(pool: Optional[asyncpg.Pool] = None):
     """Comprehensive health check including Vault status"""
     health_status = {
         "status": "healthy",
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": utc_timestamp(),
         "components": {}
     }
     
-    # Check database connection
+    # Check database connection on the shared pool rather than opening a new one per probe
     try:
-        async with asyncpg.create_pool(get_db_url(), min_size=1, max_size=1) as pool:
-            async with pool.acquire() as conn:
-                await conn.fetchval("SELECT 1")
+        if pool is None:
+            pool = await get_db_pool()
+        # Bounded wait so a saturated pool reports unhealthy instead of hanging the probe
+        async with pool.acquire(timeout=HEALTH_CHECK_ACQUIRE_TIMEOUT) as conn:
+            await conn.fetchval(PING_QUERY)
         health_status["components"]["database"] = {"status": "healthy"}
     except Exception as e:
         health_status["components"]["database"] = {"status": "unhealthy", "error": str(e)}
@@ -443,12 +1045,9 @@ async def health_check():
         health_status["status"] = "degraded"
     
     # Check JWT configuration
-    try:
-        test_token = create_access_token({"sub": "health_check"})
-        verify_token(test_token)
-        health_status["components"]["jwt"] = {"status": "healthy"}
-    except Exception as e:
-        health_status["components"]["jwt"] = {"status": "unhealthy", "error": str(e)}
+    jwt_health = _check_jwt_health()
+    health_status["components"]["jwt"] = jwt_health
+    if jwt_health["status"] != "healthy":
         health_status["status"] = "unhealthy"
     
-    return health_status
\ No newline at end of file
+    return health_status
@@ -1,22 +1,29 @@
-from fastapi import FastAPI, Depends, HTTPException, status, BackgroundTasks, Request
+from fastapi import FastAPI, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import logging
 import os
 import json
+import asyncio
 import asyncpg
+import orjson
 import time
+
+# Configure logging at the entrypoint, before service modules emit their first records
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
 from .schemas import UserCreate, UserLogin, Token, TokenRefresh, TokenRevoke
-from .dependencies import get_db_pool, oauth2_scheme, verify_token, verify_refresh_token, pwd_context, logger, get_db_url, get_redis
-from .dependencies import create_access_token, create_refresh_token, create_tokens, revoke_token, get_pool_stats
+from .dependencies import get_db_pool, oauth2_scheme, verify_token, verify_refresh_token, verify_password, get_password_hash, password_needs_rehash, warm_password_hasher, logger, get_db_url, get_redis
+from .dependencies import create_access_token, create_refresh_token, create_tokens, revoke_token, get_pool_stats, current_db_pool, close_db_pool, get_jwt_settings, HEALTH_CHECK_ACQUIRE_TIMEOUT
+from .dependencies import start_hash_executor, shutdown_hash_executor, sync_revoked_tokens, USER_BY_EMAIL_QUERY, PING_QUERY, DB_ACQUIRE_TIMEOUT, pool_busy_error
 from .messaging import event_bus
+from .utils import LocalRateLimiter, client_ip, utc_timestamp
 # Temporarily disable telemetry due to import issues
 # from .telemetry import extract_context_from_request, create_span, add_span_attributes, mark_span_error
 from contextlib import nullcontext
@@ -24,8 +31,7 @@ extract_context_from_request = lambda x: None
 create_span = lambda *args, **kwargs: nullcontext()
 add_span_attributes = lambda x: None
 mark_span_error = lambda x: None
-from prometheus_fastapi_instrumentator import Instrumentator
-from datetime import datetime, timezone
+from prometheus_fastapi_instrumentator import Instrumentator, metrics
 
 # Set service name for messaging
 os.environ["SERVICE_NAME"] = "auth-service"
@@ -33,21 +39,51 @@ os.environ["SERVICE_NAME"] = "auth-service"
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Initialize rate limiter. Counters live in each worker's memory unless
+# RATE_LIMIT_STORAGE_URI points at a shared store (e.g. redis://redis:6379), which makes
+# limits exact across workers at the cost of a synchronous Redis round trip per request.
+limiter = Limiter(
+    key_func=client_ip,
+    storage_uri=os.environ.get("RATE_LIMIT_STORAGE_URI", "memory://"),
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up auth service...")
+    # Resolve JWT settings from Vault once so requests never wait on it; the Vault client
+    # is blocking, so keep it off the event loop
+    try:
+        await asyncio.to_thread(get_jwt_settings)
+    except HTTPException:
+        logger.warning("JWT settings not available at startup, will retry on first request")
+    # Dedicated workers for password hashing; compute the unknown-user dummy hash on them
+    # now rather than on the first failed login
+    hash_executor = start_hash_executor()
+    await asyncio.get_running_loop().run_in_executor(hash_executor, warm_password_hasher)
+    # Create the shared database pool once instead of on the first request
+    try:
+        await get_db_pool()
+    except HTTPException:
+        logger.warning("Database pool not available at startup, will retry on first request")
     await event_bus.connect()
+    # Mirror revocations locally so token checks rarely need a Redis round trip
+    revocation_sync = asyncio.create_task(sync_revoked_tokens())
+    # Load balancers poll /status constantly; it reads what this prober last saw
+    db_prober = asyncio.create_task(_probe_database())
+    # All routes are registered by now; pay for the schema walk before the first docs fetch
+    _cache_openapi_schema()
     logger.info("Auth service startup complete")
     
     yield
     
     # Shutdown
     logger.info("Shutting down auth service...")
+    revocation_sync.cancel()
+    db_prober.cancel()
     await event_bus.close()
+    await close_db_pool()
+    shutdown_hash_executor()
     logger.info("Auth service shutdown complete")
 
 # Initialize FastAPI with enhanced metadata
@@ -68,6 +104,7 @@ app = FastAPI(
     docs_url=None,
     redoc_url=None,
     openapi_url=None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -76,7 +113,18 @@ app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # Add instrumentation
-Instrumentator().instrument(app).expose(app)
+# Status codes grouped (2xx/4xx/5xx), probe endpoints skipped, and a short latency histogram:
+# the dashboards only chart request rate and p50/p95 latency
+METRICS_EXCLUDED_HANDLERS = ["^/health$", "^/test$", "^/metrics$"]
+METRICS_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5)  # seconds
+Instrumentator(
+    should_group_status_codes=True,
+    should_ignore_untemplated=True,
+    excluded_handlers=METRICS_EXCLUDED_HANDLERS,
+    inprogress_labels=False,
+).add(metrics.requests()).add(
+    metrics.latency(buckets=METRICS_LATENCY_BUCKETS)
+).instrument(app).expose(app)
 
 # Add CORS middleware with more restrictive settings
 app.add_middleware(
@@ -98,61 +146,67 @@ app.add_middleware(
     expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining"],
 )
 
+# Invariant part of the generic 404 body, serialized once without its closing brace;
+# the handler appends the per-request fields (a JSON object minus its opening brace)
+_NOT_FOUND_PREFIX = orjson.dumps({
+    "detail": "Endpoint not found",
+    "available_endpoints": [
+        "/health",
+        "/status",
+        "/metrics/pool",
+        "/docs", 
+        "/openapi.json",
+        "/signup",
+        "/login",
+        "/token",
+        "/token/refresh",
+        "/token/revoke",
+        "/test"
+    ],
+    "service": "auth-service"
+})[:-1] + b","
+
 # Global exception handlers for better error handling
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc: HTTPException):
     """Handle 404 errors with detailed logging"""
-    logger.warning(f"404 Not Found: {request.method} {request.url.path} from {get_remote_address(request)}")
+    logger.warning("404 Not Found: %s %s from %s", request.method, request.url.path, client_ip(request))
     
     # Check if it's an API endpoint or static file request
     if request.url.path.startswith("/api/") or request.url.path.startswith("/static/"):
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=404,
             content={
                 "detail": "Resource not found",
                 "path": request.url.path,
                 "method": request.method,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": utc_timestamp(),
                 "service": "auth-service"
             }
         )
     
     # For other 404 errors, provide helpful response
-    return JSONResponse(
-        status_code=404,
-        content={
-            "detail": "Endpoint not found",
+    return Response(
+        _NOT_FOUND_PREFIX + orjson.dumps({
             "path": request.url.path,
             "method": request.method,
-            "available_endpoints": [
-                "/health",
-                "/status",
-                "/metrics/pool",
-                "/docs", 
-                "/openapi.json",
-                "/signup",
-                "/login",
-                "/token",
-                "/token/refresh",
-                "/token/revoke",
-                "/test"
-            ],
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "service": "auth-service"
-        }
+            "timestamp": utc_timestamp()
+        })[1:],
+        status_code=404,
+        media_type="application/json"
     )
 
 @app.exception_handler(500)
 async def internal_server_error_handler(request: Request, exc: HTTPException):
     """Handle 500 errors with logging"""
-    logger.error(f"500 Internal Server Error: {request.method} {request.url.path} from {get_remote_address(request)}")
-    return JSONResponse(
+    logger.error("500 Internal Server Error: %s %s from %s", request.method, request.url.path, client_ip(request))
+    return ORJSONResponse(
         status_code=500,
         content={
             "detail": "Internal server error",
             "path": request.url.path,
             "method": request.method,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": utc_timestamp(),
             "service": "auth-service"
         }
     )
@@ -160,43 +214,75 @@ async def internal_server_error_handler(request: Request, exc: HTTPException):
 @app.exception_handler(503)
 async def service_unavailable_handler(request: Request, exc: HTTPException):
     """Handle 503 Service Unavailable errors"""
-    logger.error(f"503 Service Unavailable: {request.method} {request.url.path} from {get_remote_address(request)}")
-    return JSONResponse(
+    logger.error("503 Service Unavailable: %s %s from %s", request.method, request.url.path, client_ip(request))
+    # Load shedding (hash admission, pool acquire timeout) sets its own Retry-After
+    headers = getattr(exc, "headers", None)
+    retry_after = int(headers["Retry-After"]) if headers and "Retry-After" in headers else 60
+    return ORJSONResponse(
         status_code=503,
         content={
             "detail": "Service temporarily unavailable",
             "path": request.url.path,
             "method": request.method,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": utc_timestamp(),
             "service": "auth-service",
-            "retry_after": 60
-        }
+            "retry_after": retry_after
+        },
+        headers=headers
     )
 
+# The docs pages are static HTML pointing at /openapi.json; render them once
+_SWAGGER_UI_HTML = get_swagger_ui_html(
+    openapi_url="/openapi.json",
+    title=app.title + " - Swagger UI",
+    oauth2_redirect_url=app.swagger_ui_oauth2_redirect_url,
+    swagger_js_url="https://cdn.jsdelivr.net/npm/swagger-ui-dist@3/swagger-ui-bundle.js",
+    swagger_css_url="https://cdn.jsdelivr.net/npm/swagger-ui-dist@3/swagger-ui.css",
+).body
+_REDOC_HTML = get_redoc_html(
+    openapi_url="/openapi.json",
+    title=app.title + " - ReDoc",
+    redoc_js_url="https://cdn.jsdelivr.net/npm/redoc@next/bundles/redoc.standalone.js",
+).body
+
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_html():
-    return get_swagger_ui_html(
-        openapi_url="/openapi.json",
-        title=app.title + " - Swagger UI",
-        oauth2_redirect_url=app.swagger_ui_oauth2_redirect_url,
-        swagger_js_url="https://cdn.jsdelivr.net/npm/swagger-ui-dist@3/swagger-ui-bundle.js",
-        swagger_css_url="https://cdn.jsdelivr.net/npm/swagger-ui-dist@3/swagger-ui.css",
-    )
+    return HTMLResponse(_SWAGGER_UI_HTML)
 
 @app.get("/redoc", include_in_schema=False)
 async def redoc_html():
-    return get_redoc_html(
-        openapi_url="/openapi.json",
-        title=app.title + " - ReDoc",
-        redoc_js_url="https://cdn.jsdelivr.net/npm/redoc@next/bundles/redoc.standalone.js",
-    )
+    return HTMLResponse(_REDOC_HTML)
+
+_openapi_bytes = None
+
+def _cache_openapi_schema() -> bytes:
+    """Build and encode the OpenAPI schema once; routes don't change after import"""
+    global _openapi_bytes
+    if _openapi_bytes is None:
+        openapi_schema = app.openapi()
+        # Force OpenAPI 3.0.3 for Swagger UI compatibility
+        openapi_schema["openapi"] = "3.0.3"
+        _openapi_bytes = orjson.dumps(openapi_schema)
+    return _openapi_bytes
 
 @app.get("/openapi.json", include_in_schema=False)
 async def get_openapi_schema():
-    openapi_schema = app.openapi()
-    # Force OpenAPI 3.0.3 for Swagger UI compatibility
-    openapi_schema["openapi"] = "3.0.3"
-    return JSONResponse(content=openapi_schema)
+    return Response(_cache_openapi_schema(), media_type="application/json")
+
+# In a real implementation, you would generate the SDK here or return pre-generated SDKs;
+# the placeholder responses only depend on the language, so they are encoded once
+_SDK_RESPONSES = {
+    language: orjson.dumps({
+        "message": f"SDK for {language} would be generated here",
+        "steps": [
+            "1. Download the OpenAPI spec from /openapi.json",
+            f"2. Use an OpenAPI generator tool to create a {language} client",
+            "3. Example command: openapi-generator-cli generate -i openapi.json -g " +
+            language + " -o ./generated-client"
+        ]
+    })
+    for language in ("typescript", "python", "java")
+}
 
 @app.get("/sdk/{language}", tags=["sdk"])
 async def generate_sdk(language: str):
@@ -204,23 +290,14 @@ async def generate_sdk(language: str):
     Generate client SDK for the specified language.
     Currently supported: 'typescript', 'python', 'java'
     """
-    if language not in ["typescript", "python", "java"]:
+    body = _SDK_RESPONSES.get(language)
+    if body is None:
         raise HTTPException(status_code=400, detail=f"SDK for {language} not available")
-    
-    # In a real implementation, you would generate the SDK here or return pre-generated SDKs
-    return {
-        "message": f"SDK for {language} would be generated here",
-        "steps": [
-            "1. Download the OpenAPI spec from /openapi.json",
-            f"2. Use an OpenAPI generator tool to create a {language} client",
-            "3. Example command: openapi-generator-cli generate -i openapi.json -g " + 
-            language + " -o ./generated-client"
-        ]
-    }
+    return Response(body, media_type="application/json")
 
 @app.post("/signup", response_model=Token, tags=["auth"])
 @limiter.limit("10000/minute")  # Increased for load testing - supports 100+ concurrent users
-async def signup(request: Request, user: UserCreate, background_tasks: BackgroundTasks, pool=Depends(get_db_pool)):
+async def signup(request: Request, user: UserCreate, pool=Depends(get_db_pool)):
     """
     Register a new user and return an access token.
     
@@ -233,63 +310,63 @@ async def signup(request: Request, user: UserCreate, background_tasks: Backgroun
     # Create a tracing span
     context = extract_context_from_request(request)
     with create_span("signup", context=context, attributes={"email": user.email}) as span:
-        logger.info(f"Processing signup request for email: {user.email}")
+        logger.info("Processing signup request for email: %s", user.email)
         try:
-            async with pool.acquire() as conn:
-                # Check if user exists
-                existing_user = await conn.fetchrow(
-                    "SELECT id FROM users WHERE email = $1", user.email
-                )
-                if existing_user:
-                    logger.warning(f"Signup attempt with existing email: {user.email}")
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Email already registered"
-                    )
-
-                # Check if username exists
-                existing_username = await conn.fetchrow(
-                    "SELECT id FROM users WHERE username = $1", user.username
-                )
-                if existing_username:
-                    logger.warning(f"Signup attempt with existing username: {user.username}")
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Username already taken"
-                    )
-
-                # Create user
-                hashed_password = pwd_context.hash(user.password)
+            # Hash before taking a connection so it is held only for the SQL
+            hashed_password = await get_password_hash(user.password)
+            async with pool.acquire(timeout=DB_ACQUIRE_TIMEOUT) as conn:
+                # Create user; the unique constraints on email and username do the existence
+                # check in the same round trip
                 query = """
                     INSERT INTO users (username, email, password_hash) 
                     VALUES ($1, $2, $3) 
+                    ON CONFLICT DO NOTHING
                     RETURNING id
                 """
                 user_id = await conn.fetchval(query, user.username, user.email, hashed_password)
-                
-                # Create tokens
-                token_data = {"sub": user.email, "user_id": str(user_id)}
-                tokens = create_tokens(token_data)
-                
-                # Add span attributes
-                add_span_attributes({"user_id": str(user_id)})
-                
-                # Publish user created event asynchronously
-                background_tasks.add_task(
-                    event_bus.publish,
-                    "user.created",
-                    {"user_id": str(user_id), "email": user.email, "username": user.username}
-                )
-                
-                logger.info(f"Successfully created user with email: {user.email}")
-                return tokens
+                if user_id is None:
+                    # Rare path: find out which field collided to report it
+                    email_taken = await conn.fetchval(
+                        "SELECT EXISTS(SELECT 1 FROM users WHERE email = $1)", user.email
+                    )
+                    if email_taken:
+                        logger.warning("Signup attempt with existing email: %s", user.email)
+                        raise HTTPException(
+                            status_code=400,
+                            detail="Email already registered"
+                        )
+                    logger.warning("Signup attempt with existing username: %s", user.username)
+                    raise HTTPException(
+                        status_code=400,
+                        detail="Username already taken"
+                    )
+            
+            # Create tokens
+            token_data = {"sub": user.email, "user_id": str(user_id)}
+            tokens = create_tokens(token_data)
+            
+            # Add span attributes
+            add_span_attributes({"user_id": str(user_id)})
+            
+            # Publish user created event asynchronously
+            event_bus.enqueue(
+                "user.created",
+                {"user_id": str(user_id), "email": user.email, "username": user.username}
+            )
+            
+            logger.info("Successfully created user with email: %s", user.email)
+            return tokens
 
+        except asyncio.TimeoutError as e:
+            logger.error("No database connection available for signup")
+            mark_span_error(e)
+            raise pool_busy_error()
         except HTTPException as he:
-            logger.error(f"HTTP Exception during signup: {str(he)}")
+            logger.error("HTTP Exception during signup: %s", he)
             mark_span_error(he)
             raise
         except Exception as e:
-            logger.error(f"Unexpected error during signup: {str(e)}")
+            logger.error("Unexpected error during signup: %s", e)
             logger.exception(e)
             mark_span_error(e)
             raise HTTPException(
@@ -297,47 +374,66 @@ async def signup(request: Request, user: UserCreate, background_tasks: Backgroun
                 detail="Internal server error during user registration"
             )
 
-@app.post("/login", response_model=Token, tags=["auth"])
-@limiter.limit("15000/minute")  # Increased for load testing - supports 100+ concurrent users
-async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
-    """
-    Authenticate a user and return an access token.
-    
-    Rate limited to 15,000 attempts per minute per IP address to support load testing.
-    """
+async def _authenticate(request: Request, form_data: OAuth2PasswordRequestForm, pool) -> Token:
+    """Shared credential check for /login and /token; each endpoint keeps its own rate limit"""
     try:
-        pool = await get_db_pool()
-        async with pool.acquire() as conn:
+        async with pool.acquire(timeout=DB_ACQUIRE_TIMEOUT) as conn:
             # Find user
             user = await conn.fetchrow(
-                "SELECT id, email, password_hash FROM users WHERE email = $1", 
+                USER_BY_EMAIL_QUERY,
                 form_data.username  # OAuth2PasswordRequestForm uses username field for email
             )
-            
-            if not user or not pwd_context.verify(form_data.password, user["password_hash"]):
-                # Log the failed attempt
-                logger.warning(f"Failed login attempt for email: {form_data.username} from IP: {get_remote_address(request)}")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Incorrect email or password",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            
-            # Create tokens
-            token_data = {"sub": user["email"], "user_id": str(user["id"])}
-            tokens = create_tokens(token_data)
-            
-            logger.info(f"User logged in: {user['email']} from IP: {get_remote_address(request)}")
-            return tokens
+        
+        # Verify with the connection already back in the pool. Unknown emails are checked
+        # against a dummy hash so they take as long as a wrong password.
+        password_hash = user["password_hash"] if user else None
+        password_ok = await verify_password(form_data.password, password_hash)
+        if not user or not password_ok:
+            # Log the failed attempt
+            logger.warning("Failed login attempt for email: %s from IP: %s", form_data.username, client_ip(request))
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect email or password",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        # Upgrade legacy bcrypt (or outdated Argon2) hashes now that we have the plaintext
+        if password_needs_rehash(password_hash):
+            try:
+                new_hash = await get_password_hash(form_data.password)
+                async with pool.acquire(timeout=DB_ACQUIRE_TIMEOUT) as conn:
+                    await conn.execute("UPDATE users SET password_hash = $1 WHERE id = $2", new_hash, user["id"])
+            except Exception as e:
+                logger.warning("Failed to rehash password for user %s: %s", user["id"], e)
+        
+        # Create tokens
+        token_data = {"sub": user["email"], "user_id": str(user["id"])}
+        tokens = create_tokens(token_data)
+        
+        logger.info("User logged in: %s from IP: %s", user['email'], client_ip(request))
+        return tokens
+    except asyncio.TimeoutError:
+        logger.error("No database connection available for login")
+        raise pool_busy_error()
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error during login: {str(e)}")
+        logger.error("Error during login: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error during login"
         )
 
+@app.post("/login", response_model=Token, tags=["auth"])
+@limiter.limit("15000/minute")  # Increased for load testing - supports 100+ concurrent users
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), pool=Depends(get_db_pool)):
+    """
+    Authenticate a user and return an access token.
+    
+    Rate limited to 15,000 attempts per minute per IP address to support load testing.
+    """
+    return await _authenticate(request, form_data, pool)
+
 @app.post("/token", response_model=Token, tags=["auth"])
 @limiter.limit("15000/minute")  # Increased for load testing - supports 100+ concurrent users
 async def token(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), pool=Depends(get_db_pool)):
@@ -346,8 +442,7 @@ async def token(request: Request, form_data: OAuth2PasswordRequestForm = Depends
     
     Rate limited to 15,000 attempts per minute per IP address to support load testing.
     """
-    # Reuse login logic
-    return await login(request, form_data)
+    return await _authenticate(request, form_data, pool)
 
 @app.post("/token/refresh", response_model=Token, tags=["auth"])
 @limiter.limit("20000/minute")  # Increased for load testing - supports 100+ concurrent users
@@ -371,12 +466,12 @@ async def refresh_token(request: Request, token_data: TokenRefresh):
         user_data = {"sub": payload["sub"], "user_id": payload["user_id"]}
         tokens = create_tokens(user_data)
         
-        logger.info(f"Refreshed token for user: {payload['sub']} from IP: {get_remote_address(request)}")
+        logger.info("Refreshed token for user: %s from IP: %s", payload['sub'], client_ip(request))
         return tokens
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error refreshing token: {str(e)}")
+        logger.error("Error refreshing token: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error during token refresh"
@@ -392,44 +487,88 @@ async def revoke_token_endpoint(request: Request, token_data: TokenRevoke, curre
     """
     try:
         await revoke_token(token_data.token)
-        logger.info(f"Token revoked for user: {current_user} from IP: {get_remote_address(request)}")
+        logger.info("Token revoked for user: %s from IP: %s", current_user, client_ip(request))
         return {"message": "Token revoked successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error revoking token: {str(e)}")
+        logger.error("Error revoking token: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to revoke token"
         )
 
+# Database liveness as last seen by the background prober, so /status never takes a pool slot
+DB_PROBE_INTERVAL = 2.0  # seconds
+_DB_PROBE_MAX_AGE = 10.0  # seconds; older results mean the prober is not running
+_db_alive = False
+_db_checked_at = float("-inf")  # time.monotonic() of the last probe
+_db_ping_seconds = 0.0  # round trip of the last probe
+_db_ping_ms = 0.0  # the same, rounded for reporting once per probe
+_db_error = None  # why the last probe failed
+# /health reuses a probe result up to this old before running SELECT 1 itself
+HEALTH_DB_PING_INTERVAL = 5.0  # seconds
+
+async def _ping_database() -> bool:
+    global _db_alive, _db_checked_at, _db_ping_seconds, _db_ping_ms, _db_error
+    start = time.monotonic()
+    try:
+        pool = await get_db_pool()
+        async with pool.acquire(timeout=HEALTH_CHECK_ACQUIRE_TIMEOUT) as conn:
+            await conn.fetchval(PING_QUERY)
+        _db_alive = True
+        _db_error = None
+    except Exception as e:
+        _db_alive = False
+        _db_error = str(e) or type(e).__name__
+    _db_checked_at = time.monotonic()
+    _db_ping_seconds = _db_checked_at - start
+    _db_ping_ms = round(_db_ping_seconds * 1000, 2)
+    return _db_alive
+
+async def _probe_database():
+    """Refresh the cached database liveness every DB_PROBE_INTERVAL seconds"""
+    while True:
+        await _ping_database()
+        await asyncio.sleep(DB_PROBE_INTERVAL)
+
+# Polled constantly by probes and load tests; a plain in-memory counter keeps the limiting
+# cheaper than the check itself
+_health_limiter = LocalRateLimiter(30000)  # per minute, increased for load testing
+
 @app.get("/health", tags=["health"])
-@limiter.limit("30000/minute")  # Increased for load testing - supports 100+ concurrent users
 async def health_check(request: Request):
     """
     Enhanced health check endpoint with comprehensive monitoring.
     
-    Rate limited to 3000 requests per minute per IP address.
+    Rate limited to 30,000 requests per minute per IP address.
     """
+    if not _health_limiter.hit(client_ip(request)):
+        return ORJSONResponse({"error": "Rate limit exceeded: 30000 per 1 minute"}, status_code=429)
+    # Database state comes from the prober's last SELECT 1 unless it is older than
+    # HEALTH_DB_PING_INTERVAL
+    if time.monotonic() - _db_checked_at > HEALTH_DB_PING_INTERVAL:
+        await _ping_database()
+    
     health_data = {
         "status": "healthy",
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": utc_timestamp(),
         "service": "auth-service",
         "version": "1.0.0"
     }
     
     try:
-        # Database health check
-        pool = await get_db_pool()
-        start_time = time.time()
-        async with pool.acquire() as conn:
-            await conn.fetchval("SELECT 1")
-        db_response_time = time.time() - start_time
+        if not _db_alive:
+            raise RuntimeError(_db_error or "Database unreachable")
+        pool = current_db_pool()
+        db_response_time = _db_ping_seconds
         
         # Get pool monitoring statistics
         pool_stats = get_pool_stats()
         
         health_data["database"] = {
             "status": "connected",
-            "response_time_ms": round(db_response_time * 1000, 2),
+            "response_time_ms": _db_ping_ms,
             "pool": {
                 "size": pool.get_size(),
                 "idle": pool.get_idle_size(),
@@ -437,8 +576,8 @@ async def health_check(request: Request):
                 "total_requests": pool_stats.total_requests,
                 "successful_connections": pool_stats.successful_connections,
                 "failed_connections": pool_stats.failed_connections,
-                "avg_connection_time_ms": round(pool_stats.avg_connection_time * 1000, 2),
-                "max_connection_time_ms": round(pool_stats.max_connection_time * 1000, 2),
+                "avg_connection_time_ms": pool_stats.avg_connection_time_ms,
+                "max_connection_time_ms": pool_stats.max_connection_time_ms,
                 "pool_exhaustion_count": pool_stats.pool_exhaustion_count
             }
         }
@@ -447,12 +586,11 @@ async def health_check(request: Request):
         try:
             redis = await get_redis()
             if redis:
-                redis_start = time.time()
+                redis_start = time.perf_counter()
                 await redis.ping()
-                redis_response_time = time.time() - redis_start
                 health_data["redis"] = {
                     "status": "connected",
-                    "response_time_ms": round(redis_response_time * 1000, 2)
+                    "response_time_ms": round((time.perf_counter() - redis_start) * 1000, 2)
                 }
             else:
                 health_data["redis"] = {"status": "not_configured"}
@@ -477,11 +615,11 @@ async def health_check(request: Request):
         return health_data
         
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         return {
             "status": "unhealthy", 
             "error": str(e),
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": utc_timestamp(),
             "service": "auth-service"
         }
 
@@ -498,80 +636,68 @@ async def pool_metrics(request: Request):
     """
     Database pool monitoring metrics endpoint.
     
-    Provides detailed statistics about database connection pool performance.
-    Rate limited to 1000 requests per minute per IP address.
+    Reports the pool's in-memory counters; it never creates the pool or takes a
+    connection. Prometheus should scrape the db_pool_* gauges on /metrics instead.
     """
-    try:
-        pool = await get_db_pool()
-        pool_stats = get_pool_stats()
-        
-        # Calculate derived metrics
-        success_rate = 0.0
-        if pool_stats.total_requests > 0:
-            success_rate = pool_stats.successful_connections / pool_stats.total_requests
-            
-        pool_utilization = 0.0
-        if pool.get_size() > 0:
-            pool_utilization = (pool.get_size() - pool.get_idle_size()) / pool.get_size()
-        
-        return {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "pool": {
-                "current_size": pool.get_size(),
-                "idle_connections": pool.get_idle_size(),
-                "active_connections": pool.get_size() - pool.get_idle_size(),
-                "max_size": 50,
-                "min_size": 10,
-                "utilization_percent": round(pool_utilization * 100, 2)
-            },
-            "statistics": {
-                "total_requests": pool_stats.total_requests,
-                "successful_connections": pool_stats.successful_connections,
-                "failed_connections": pool_stats.failed_connections,
-                "success_rate_percent": round(success_rate * 100, 2),
-                "avg_connection_time_ms": round(pool_stats.avg_connection_time * 1000, 2),
-                "max_connection_time_ms": round(pool_stats.max_connection_time * 1000, 2),
-                "pool_exhaustion_events": pool_stats.pool_exhaustion_count,
-                "last_health_check": pool_stats.last_health_check.isoformat() if pool_stats.last_health_check else None
-            },
-            "alerts": {
-                "high_utilization": pool_utilization > 0.8,
-                "low_success_rate": success_rate < 0.95 if pool_stats.total_requests > 10 else False,
-                "slow_connections": pool_stats.avg_connection_time > 1.0,
-                "pool_exhaustion": pool_stats.pool_exhaustion_count > 0
-            }
+    pool = current_db_pool()
+    if pool is None:
+        raise HTTPException(status_code=503, detail="Database pool not initialized")
+    pool_stats = get_pool_stats()
+    
+    size = pool.get_size()
+    idle = pool.get_idle_size()
+    success_rate = pool_stats.successful_connections / pool_stats.total_requests if pool_stats.total_requests else 0.0
+    pool_utilization = (size - idle) / size if size else 0.0
+    
+    return {
+        "timestamp": utc_timestamp(),
+        "pool": {
+            "current_size": size,
+            "idle_connections": idle,
+            "active_connections": size - idle,
+            "max_size": pool.get_max_size(),
+            "min_size": pool.get_min_size(),
+            "utilization_percent": pool_utilization * 100
+        },
+        "statistics": {
+            "total_requests": pool_stats.total_requests,
+            "successful_connections": pool_stats.successful_connections,
+            "failed_connections": pool_stats.failed_connections,
+            "success_rate_percent": success_rate * 100,
+            "avg_connection_time_ms": pool_stats.avg_connection_time_ms,
+            "max_connection_time_ms": pool_stats.max_connection_time_ms,
+            "pool_exhaustion_events": pool_stats.pool_exhaustion_count,
+            "last_health_check": pool_stats.last_health_check.isoformat() if pool_stats.last_health_check else None
+        },
+        "alerts": {
+            "high_utilization": pool_utilization > 0.8,
+            "low_success_rate": success_rate < 0.95 if pool_stats.total_requests > 10 else False,
+            "slow_connections": pool_stats.avg_connection_time > 1.0,
+            "pool_exhaustion": pool_stats.pool_exhaustion_count > 0
         }
-    except Exception as e:
-        logger.error(f"Pool metrics error: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to retrieve pool metrics"
-        )
+    }
+
+_status_limiter = LocalRateLimiter(50000)  # per minute, increased for load testing
 
 @app.get("/status", tags=["health"])
-@limiter.limit("50000/minute")  # Increased for load testing - supports 100+ concurrent users
 async def service_status(request: Request):
     """
     Lightweight service status check for load balancers.
     
-    Returns minimal status information for quick health checks.
-    Rate limited to 5000 requests per minute per IP address.
+    Returns minimal status information for quick health checks, from the database state
+    cached by the background prober.
+    Rate limited to 50,000 requests per minute per IP address.
     """
-    try:
-        # Quick database connection test without full pool stats
-        pool = await get_db_pool()
-        async with pool.acquire() as conn:
-            await conn.fetchval("SELECT 1")
-        
-        return {
-            "status": "healthy",
-            "service": "auth-service",
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        }
-    except Exception:
-        # Don't log errors for this lightweight endpoint to avoid log spam
-        return {
-            "status": "unhealthy",
-            "service": "auth-service", 
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        }
\ No newline at end of file
+    if not _status_limiter.hit(client_ip(request)):
+        return ORJSONResponse({"error": "Rate limit exceeded: 50000 per 1 minute"}, status_code=429)
+    db_alive = _db_alive
+    if time.monotonic() - _db_checked_at > _DB_PROBE_MAX_AGE:
+        # Prober not running (e.g. no lifespan): check directly rather than report stale state
+        db_alive = await _ping_database()
+    
+    # Don't log errors for this lightweight endpoint to avoid log spam
+    return {
+        "status": "healthy" if db_alive else "unhealthy",
+        "service": "auth-service",
+        "timestamp": utc_timestamp()
+    }
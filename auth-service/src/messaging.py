@@ -1,11 +1,19 @@
-import json
+import asyncio
 import os
+import orjson
 import pika
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Callable
 
 logger = logging.getLogger(__name__)
 
+# Outgoing events are buffered in memory and published in batches by a single worker
+EVENT_QUEUE_SIZE = int(os.environ.get("EVENT_QUEUE_SIZE", "10000"))
+EVENT_BATCH_SIZE = 256
+# How long the worker lets a partial batch fill before publishing it
+EVENT_BATCH_LINGER = float(os.environ.get("EVENT_BATCH_LINGER_MS", "20")) / 1000
+
 class EventBus:
     """Event bus for publishing and consuming messages."""
     
@@ -18,9 +26,25 @@ class EventBus:
         self.channel = None
         self.exchange_name = "dididentity"
         self.subscribers = {}
+        self._queue = None
+        self._worker = None
+        # pika's BlockingConnection is not thread-safe and does blocking socket I/O: every
+        # call on it (connect, publish, subscribe, close) goes through this one thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-bus")
+        self._properties = pika.BasicProperties(
+            delivery_mode=2,  # Make message persistent
+            content_type='application/json'
+        )
         
+    async def _run(self, fn, *args):
+        """Run a pika call on the connection's owning thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
     async def connect(self):
         """Connect to RabbitMQ."""
+        return await self._run(self._connect)
+
+    def _connect(self):
         try:
             # Create connection parameters with credentials
             credentials = pika.PlainCredentials(self.username, self.password)
@@ -43,44 +67,94 @@ class EventBus:
                 durable=True
             )
             
-            logger.info(f"Connected to RabbitMQ at {self.host}")
+            logger.info("Connected to RabbitMQ at %s", self.host)
             return True
         except Exception as e:
-            logger.error(f"Failed to connect to RabbitMQ: {str(e)}")
+            logger.error("Failed to connect to RabbitMQ: %s", e)
             return False
+
+    def _ensure_connected(self):
+        if not self.connection or self.connection.is_closed:
+            if not self._connect():
+                raise ConnectionError(f"RabbitMQ unavailable at {self.host}")
     
     async def publish(self, event_type: str, data: Dict[str, Any]):
-        """Publish an event to the event bus."""
-        if not self.connection or self.connection.is_closed:
-            await self.connect()
-            
+        """
+        Publish an event to the event bus and wait for the outcome.
+
+        Runs on the connection thread like the batch worker; request handlers should use
+        enqueue() instead.
+        """
+        published = await self._run(self._publish_batch, [(event_type, orjson.dumps(data))])
+        if published:
+            logger.info("Published event %s: %s", event_type, data)
+        return published == 1
+    
+    def enqueue(self, event_type: str, data: Dict[str, Any]) -> bool:
+        """
+        Queue an event for the background publisher without waiting on RabbitMQ.
+
+        Returns False (and drops the event) when the queue is full, so a broker outage
+        degrades to lost notifications instead of unbounded memory growth.
+        """
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+            self._worker = asyncio.create_task(self._publish_worker())
         try:
-            # Convert data to JSON
-            message = json.dumps(data)
-            
-            # Publish message
-            self.channel.basic_publish(
-                exchange=self.exchange_name,
-                routing_key=event_type,
-                body=message,
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # Make message persistent
-                    content_type='application/json'
-                )
-            )
-            
-            logger.info(f"Published event {event_type}: {message}")
+            self._queue.put_nowait((event_type, orjson.dumps(data)))
             return True
-        except Exception as e:
-            logger.error(f"Failed to publish event {event_type}: {str(e)}")
+        except asyncio.QueueFull:
+            logger.warning("Event queue full, dropping %s event", event_type)
             return False
-    
+
+    async def _publish_worker(self):
+        """Drain the event queue, publishing up to EVENT_BATCH_SIZE events (or what arrives within EVENT_BATCH_LINGER) per thread hop."""
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            if EVENT_BATCH_LINGER and queue.qsize() < EVENT_BATCH_SIZE - 1:
+                await asyncio.sleep(EVENT_BATCH_LINGER)
+            while len(batch) < EVENT_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await self._run(self._publish_batch, batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _publish_batch(self, batch) -> int:
+        """
+        Publish (event_type, body) pairs on the connection thread.
+
+        Returns how many went out; if the broker fails part way, the events not sent are
+        logged individually rather than dropped silently.
+        """
+        sent = 0
+        try:
+            self._ensure_connected()
+            for event_type, body in batch:
+                self.channel.basic_publish(
+                    exchange=self.exchange_name,
+                    routing_key=event_type,
+                    body=body,
+                    properties=self._properties
+                )
+                sent += 1
+        except Exception as e:
+            logger.error("Failed to publish %d of %d events: %s", len(batch) - sent, len(batch), e)
+            for event_type, body in batch[sent:]:
+                logger.error("Unpublished %s event: %s", event_type, body.decode())
+        else:
+            logger.debug("Published %d events", sent)
+        return sent
+
     async def subscribe(self, event_type: str, callback: Callable):
         """Subscribe to an event type."""
-        if not self.connection or self.connection.is_closed:
-            await self.connect()
-            
+        return await self._run(self._subscribe, event_type, callback)
+
+    def _subscribe(self, event_type: str, callback: Callable):
         try:
+            self._ensure_connected()
             # Declare a queue for this service
             service_name = os.environ.get("SERVICE_NAME", "auth-service")
             queue_name = f"{service_name}.{event_type}"
@@ -102,17 +176,17 @@ class EventBus:
                 auto_ack=False
             )
             
-            logger.info(f"Subscribed to event {event_type} on queue {queue_name}")
+            logger.info("Subscribed to event %s on queue %s", event_type, queue_name)
             return True
         except Exception as e:
-            logger.error(f"Failed to subscribe to event {event_type}: {str(e)}")
+            logger.error("Failed to subscribe to event %s: %s", event_type, e)
             return False
     
     def _on_message(self, channel, method, properties, body):
         """Handle incoming messages."""
         try:
             # Parse message
-            message = json.loads(body)
+            message = orjson.loads(body)
             event_type = method.routing_key
             
             # Call callback if exists
@@ -122,31 +196,47 @@ class EventBus:
             # Acknowledge message
             channel.basic_ack(delivery_tag=method.delivery_tag)
             
-            logger.info(f"Processed event {event_type}")
+            logger.info("Processed event %s", event_type)
         except Exception as e:
-            logger.error(f"Error processing message: {str(e)}")
+            logger.error("Error processing message: %s", e)
             # Reject message and requeue
             channel.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
     
     async def start_consuming(self):
-        """Start consuming messages."""
-        if not self.connection or self.connection.is_closed:
-            await self.connect()
-            
+        """
+        Start consuming messages.
+
+        Blocks the connection thread until consuming stops, so nothing can be published
+        on this bus meanwhile.
+        """
+        await self._run(self._start_consuming)
+
+    def _start_consuming(self):
         try:
+            self._ensure_connected()
             logger.info("Starting to consume messages")
             self.channel.start_consuming()
         except Exception as e:
-            logger.error(f"Error consuming messages: {str(e)}")
+            logger.error("Error consuming messages: %s", e)
     
     async def close(self):
-        """Close connection to RabbitMQ."""
+        """Flush queued events, then close connection to RabbitMQ."""
+        if self._worker is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=5)
+            except asyncio.TimeoutError:
+                logger.warning("Dropping %d unpublished events on shutdown", self._queue.qsize())
+            self._worker.cancel()
+            self._worker = None
+        await self._run(self._close)
+
+    def _close(self):
         try:
             if self.connection and not self.connection.is_closed:
                 logger.info("Closing connection to RabbitMQ")
                 self.connection.close()
         except Exception as e:
-            logger.error(f"Error closing RabbitMQ connection: {str(e)}")
+            logger.error("Error closing RabbitMQ connection: %s", e)
 
 # Create a singleton instance
 event_bus = EventBus() 
\ No newline at end of file
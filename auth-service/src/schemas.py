@@ -1,7 +1,15 @@
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional
 import re
 
+# Compiled once; the validators run on every signup
+_UPPERCASE_RE = re.compile(r'[A-Z]')
+_LOWERCASE_RE = re.compile(r'[a-z]')
+_DIGIT_RE = re.compile(r'\d')
+_SPECIAL_RE = re.compile(r'[!@#$%^&*(),.?":{}|<>]')
+_WEAK_PATTERN_RE = re.compile(r'123456|password|qwerty|abc123|111111')
+_USERNAME_RE = re.compile(r'[a-zA-Z0-9_-]+')
+
 class UserCreate(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
     email: EmailStr
@@ -12,35 +20,36 @@ class UserCreate(BaseModel):
         description="Password must be at least 12 characters with uppercase, lowercase, digit, and special character"
     )
     
-    @validator('password')
+    @field_validator('password')
+    @classmethod
     def validate_password_strength(cls, v):
         """Validate password strength requirements"""
         if len(v) < 12:
             raise ValueError('Password must be at least 12 characters long')
         
-        if not re.search(r'[A-Z]', v):
+        if not _UPPERCASE_RE.search(v):
             raise ValueError('Password must contain at least one uppercase letter')
         
-        if not re.search(r'[a-z]', v):
+        if not _LOWERCASE_RE.search(v):
             raise ValueError('Password must contain at least one lowercase letter')
         
-        if not re.search(r'\d', v):
+        if not _DIGIT_RE.search(v):
             raise ValueError('Password must contain at least one digit')
         
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', v):
+        if not _SPECIAL_RE.search(v):
             raise ValueError('Password must contain at least one special character (!@#$%^&*(),.?":{}|<>)')
         
         # Check for common weak patterns
-        common_patterns = ['123456', 'password', 'qwerty', 'abc123', '111111']
-        if any(pattern in v.lower() for pattern in common_patterns):
+        if _WEAK_PATTERN_RE.search(v.lower()):
             raise ValueError('Password contains common weak patterns')
         
         return v
     
-    @validator('username')
+    @field_validator('username')
+    @classmethod
     def validate_username(cls, v):
         """Validate username format"""
-        if not re.match(r'^[a-zA-Z0-9_-]+$', v):
+        if not _USERNAME_RE.fullmatch(v):
             raise ValueError('Username can only contain letters, numbers, underscores, and hyphens')
         return v
 
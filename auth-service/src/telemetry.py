@@ -16,11 +16,14 @@ from opentelemetry.sdk.resources import SERVICE_NAME, Resource
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 from fastapi import Request
 
+# Read once at import: whether tracing is on never changes for the life of the process
+OTEL_ENABLED = os.environ.get("OTEL_SDK_DISABLED", "").lower() != "true"
+
 # Initialize tracer
 def init_tracer():
     """Initialize OpenTelemetry tracer."""
     # Check if OpenTelemetry is disabled (e.g., during tests)
-    if os.environ.get("OTEL_SDK_DISABLED", "").lower() == "true":
+    if not OTEL_ENABLED:
         logger.info("OpenTelemetry is disabled via OTEL_SDK_DISABLED environment variable")
         return None
     
@@ -44,16 +47,23 @@ def init_tracer():
         )
         
         # Add exporter to the provider
-        processor = BatchSpanProcessor(otlp_exporter)
+        # Larger, less frequent exports than the SDK defaults (2048/512/5s queue/batch/delay
+        # are tuned for low volume); spans are buffered and shipped in bulk
+        processor = BatchSpanProcessor(
+            otlp_exporter,
+            max_queue_size=8192,
+            max_export_batch_size=1024,
+            schedule_delay_millis=2000
+        )
         provider.add_span_processor(processor)
         
         # Set the provider as the global provider
         trace.set_tracer_provider(provider)
         
-        logger.info(f"OpenTelemetry tracer initialized for {os.environ.get('SERVICE_NAME', 'auth-service')}")
+        logger.info("OpenTelemetry tracer initialized for %s", os.environ.get('SERVICE_NAME', 'auth-service'))
         return provider
     except Exception as e:
-        logger.error(f"Failed to initialize OpenTelemetry tracer: {str(e)}")
+        logger.error("Failed to initialize OpenTelemetry tracer: %s", e)
         return None
 
 # Get a tracer
@@ -61,11 +71,18 @@ def get_tracer():
     """Get a tracer to use in the application."""
     return trace.get_tracer(__name__)
 
+_propagator = TraceContextTextMapPropagator()
+
 # Helper function to extract trace context from request
-def extract_context_from_request(request: Request):
+def _extract_context(request: Request):
     """Extract trace context from request headers."""
-    propagator = TraceContextTextMapPropagator()
-    return propagator.extract(carrier=request.headers)
+    return _propagator.extract(carrier=request.headers)
+
+def _no_context(request: Request):
+    """Tracing is disabled: there is no parent context to look for."""
+    return None
+
+extract_context_from_request = _extract_context if OTEL_ENABLED else _no_context
 
 # Helper to create a span
 def create_span(name, context=None, attributes=None):
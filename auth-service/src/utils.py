@@ -1,6 +1,55 @@
 import logging
+import time
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
 def log_request_info(method: str, path: str):
-    logger.info(f"Received {method} request to {path}")
\ No newline at end of file
+    logger.info("Received %s request to %s", method, path)
+
+def client_ip(request) -> str:
+    """
+    Peer address straight from the ASGI scope, as slowapi's get_remote_address reports it.
+
+    Skips building request.client; X-Forwarded-For is deliberately not consulted, since a
+    client-supplied header must not pick its own rate-limit bucket.
+    """
+    client = request.scope.get("client")
+    return client[0] if client and client[0] else "127.0.0.1"
+
+_timestamp_second = None
+_timestamp_iso = ""
+
+def utc_timestamp() -> str:
+    """Current UTC time as ISO-8601 at one-second resolution, formatted at most once a second"""
+    global _timestamp_second, _timestamp_iso
+    now = int(time.time())
+    if now != _timestamp_second:
+        _timestamp_iso = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        _timestamp_second = now
+    return _timestamp_iso
+
+class LocalRateLimiter:
+    """
+    Fixed-window per-client request counter kept in process memory.
+
+    For cheap probe endpoints where slowapi's per-request key building and storage calls
+    cost more than the handler. Like slowapi's default memory storage, limits are per
+    worker process. All windows reset together, so the table never outgrows one window.
+    """
+
+    def __init__(self, limit: int, window: float = 60.0):
+        self.limit = limit
+        self.window = window
+        self._window_start = time.monotonic()
+        self._counts = {}
+
+    def hit(self, key) -> bool:
+        """Count one request for key; False once it is over the limit for this window"""
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._counts.clear()
+            self._window_start = now
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        return count <= self.limit
@@ -0,0 +1,168 @@
+import asyncio
+import sys
+import types
+import pathlib
+
+import pytest
+
+# --------------------------------------------------------------------------------------
+# Load the service modules as a proper Python package so that relative imports
+# (e.g. `from .schemas import Token`) inside the service code work during the test run.
+# Installed once here, before any test module is collected; test modules then import
+# `authservice.<module>` like any other package.
+# --------------------------------------------------------------------------------------
+SERVICE_SRC = pathlib.Path(__file__).resolve().parents[2] / "src"
+PACKAGE_NAME = "authservice"
+
+if PACKAGE_NAME not in sys.modules:
+    pkg = types.ModuleType(PACKAGE_NAME)
+    pkg.__path__ = [str(SERVICE_SRC)]
+    sys.modules[PACKAGE_NAME] = pkg
+
+
+@pytest.fixture
+def jwt_secret(monkeypatch):
+    """Serve a fixed JWT secret through the settings cache instead of Vault."""
+    from authservice import dependencies
+
+    monkeypatch.setattr(dependencies, "get_jwt_secret_key", lambda: "test-secret-key")
+    dependencies.invalidate_jwt_settings()
+    yield "test-secret-key"
+    dependencies.invalidate_jwt_settings()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.published = []
+        self.lookups = 0
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class _Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def setex(self, key, ttl, value):
+                self.commands.append(lambda: redis.store.__setitem__(key, (ttl, value)))
+
+            def publish(self, channel, message):
+                self.commands.append(lambda: redis.published.append((channel, message)))
+
+            async def execute(self):
+                for command in self.commands:
+                    command()
+
+        return _Pipeline()
+
+    async def exists(self, key):
+        self.lookups += 1
+        return int(key in self.store)
+
+    async def scan_iter(self, match, count):
+        for key in list(self.store):
+            if key.startswith(match.rstrip(b"*")):
+                yield key
+
+    async def mget(self, keys):
+        return [str(self.store[key][1]).encode() for key in keys]
+
+    def pubsub(self):
+        redis = self
+
+        class _PubSub:
+            async def subscribe(self, channel):
+                self.channel = channel
+
+            async def listen(self):
+                for channel, message in redis.published:
+                    if channel == self.channel:
+                        yield {"type": "message", "data": message.encode()}
+                # Stands in for shutdown cancelling the listener
+                raise asyncio.CancelledError
+
+            async def aclose(self):
+                pass
+
+        return _PubSub()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Serve an in-memory FakeRedis through dependencies.get_redis."""
+    from authservice import dependencies
+
+    redis = FakeRedis()
+
+    async def fake_get_redis():
+        return redis
+
+    monkeypatch.setattr(dependencies, "get_redis", fake_get_redis)
+    return redis
+
+
+class FakePool:
+    """
+    asyncpg-style pool stub; tests set its attributes to shape what connections return.
+
+    fetchval answers from fetchval_results in order, then 1; fetchrow answers row. Every
+    query is recorded in queries. With acquire_error set, acquiring raises it instead.
+    """
+
+    def __init__(self):
+        self.acquired = 0
+        self.timeouts = []
+        self.queries = []
+        self.fetchval_results = []
+        self.row = None
+        self.acquire_error = None
+        self.size, self.idle, self.max_size, self.min_size = 4, 3, 20, 2
+
+    def get_size(self):
+        return self.size
+
+    def get_idle_size(self):
+        return self.idle
+
+    def get_max_size(self):
+        return self.max_size
+
+    def get_min_size(self):
+        return self.min_size
+
+    def acquire(self, timeout=None):
+        pool = self
+        self.timeouts.append(timeout)
+
+        class _Conn:
+            async def __aenter__(self):
+                if pool.acquire_error is not None:
+                    raise pool.acquire_error
+                pool.acquired += 1
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def fetchval(self, query, *args):
+                pool.queries.append(" ".join(query.split()))
+                return pool.fetchval_results.pop(0) if pool.fetchval_results else 1
+
+            async def fetchrow(self, query, *args):
+                pool.queries.append(" ".join(query.split()))
+                return pool.row
+
+        return _Conn()
+
+
+@pytest.fixture
+def fake_pool():
+    """A FakePool with default answers; tests adjust its attributes as needed."""
+    return FakePool()
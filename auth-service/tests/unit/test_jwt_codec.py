@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+import jwt
+import pytest
+
+from authservice import jwt_codec
+
+
+def test_hs256_codec_tokens_verify_with_pyjwt():
+    """Tokens signed by the pre-keyed codec must be standard HS256 JWTs."""
+    codec = jwt_codec.HS256Codec("test-secret-key")
+    expire = datetime.now(timezone.utc) + timedelta(minutes=5)
+    token = codec.encode({"sub": "alice@example.com", "exp": expire})
+
+    claims = jwt.decode(token, "test-secret-key", algorithms=["HS256"])
+    assert claims["sub"] == "alice@example.com"
+    assert claims["exp"] == int(expire.timestamp())
+
+
+def test_hs256_codec_signatures_are_independent():
+    """Copying the keyed template must not leak state between signatures."""
+    codec = jwt_codec.HS256Codec("test-secret-key")
+    first = codec.sign(b"a.b")
+    codec.sign(b"c.d")
+    assert codec.sign(b"a.b") == first
+
+
+def test_orjson_decoder_round_trips_codec_tokens():
+    """The orjson-backed decoder must accept codec tokens and reject tampered ones."""
+    codec = jwt_codec.HS256Codec("test-secret-key")
+    expire = datetime.now(timezone.utc) + timedelta(minutes=5)
+    token = codec.encode({"sub": "alice@example.com", "exp": expire})
+
+    decoder = jwt_codec.OrjsonPyJWT()
+    assert decoder.decode(token, "test-secret-key", algorithms=["HS256"])["sub"] == "alice@example.com"
+    with pytest.raises(jwt.InvalidSignatureError):
+        decoder.decode(token, "other-secret", algorithms=["HS256"])
+
+
+def test_hs256_codec_decode_matches_pyjwt_checks():
+    """The inlined verifier must reject what jwt.decode rejects."""
+    codec = jwt_codec.HS256Codec("test-secret-key")
+    expire = datetime.now(timezone.utc) + timedelta(minutes=5)
+    token = codec.encode({"sub": "alice@example.com", "exp": expire})
+    assert codec.decode(token) == jwt.decode(token, "test-secret-key", algorithms=["HS256"])
+
+    header, payload, signature = token.split(".")
+    with pytest.raises(jwt.InvalidSignatureError):
+        codec.decode(f"{header}.{payload}.{signature[:-2]}AA")
+    with pytest.raises(jwt.DecodeError):
+        codec.decode(f"{header}.{payload}")
+
+    expired = codec.encode({"sub": "alice@example.com", "exp": datetime.now(timezone.utc) - timedelta(seconds=1)})
+    with pytest.raises(jwt.ExpiredSignatureError):
+        codec.decode(expired)
+    with pytest.raises(jwt.MissingRequiredClaimError):
+        codec.decode(codec.encode({"sub": "alice@example.com"}))
+
+    foreign = jwt.encode({"sub": "alice@example.com", "exp": expire}, "test-secret-key", algorithm="HS384")
+    with pytest.raises(jwt.PyJWTError):
+        codec.decode(foreign)
+
+
+def test_hs256_codec_uses_standard_header():
+    """The pre-encoded header must decode to the HS256 JWT header."""
+    token = jwt_codec.HS256Codec("test-secret-key").encode({"sub": "alice@example.com"})
+    assert jwt.get_unverified_header(token) == {"alg": "HS256", "typ": "JWT"}
+
+
+def test_hs256_codec_rejects_foreign_alg_before_hmac(monkeypatch):
+    """A token whose header names another alg is rejected without computing an HMAC."""
+    codec = jwt_codec.HS256Codec("test-secret-key")
+    foreign = jwt.encode({"sub": "alice@example.com", "exp": 2**31}, "test-secret-key", algorithm="HS512")
+
+    def fail_sign(signing_input):
+        raise AssertionError("HMAC must not run for a foreign header")
+
+    monkeypatch.setattr(codec, "sign", fail_sign)
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        codec.decode(foreign)
+
+    pyjwt_token = jwt.encode({"sub": "alice@example.com", "exp": 2**31}, "test-secret-key", algorithm="HS256")
+    assert pyjwt_token.split(".")[0] == jwt_codec._HS256_HEADER_B64.decode()
@@ -1,18 +1,7 @@
-import sys
-import types
-import pathlib
-import importlib
+import pytest
 from fastapi.testclient import TestClient
 
-SRC_ROOT = pathlib.Path(__file__).resolve().parents[2] / "src"
-PKG_NAME = "authservice"
-
-if PKG_NAME not in sys.modules:
-    pkg = types.ModuleType(PKG_NAME)
-    pkg.__path__ = [str(SRC_ROOT.parent)]
-    sys.modules[PKG_NAME] = pkg
-
-main = importlib.import_module(f"{PKG_NAME}.main")
+from authservice import dependencies, main
 app = main.app
 client = TestClient(app)
 
@@ -32,4 +21,132 @@ def test_sdk_endpoint_valid():
 
 def test_sdk_endpoint_invalid():
     r = client.get("/sdk/rust")
-    assert r.status_code == 400 
\ No newline at end of file
+    assert r.status_code == 400 
+
+
+@pytest.mark.parametrize(
+    "email_taken, detail", [(True, "Email already registered"), (False, "Username already taken")]
+)
+def test_signup_conflict_is_detected_by_the_insert(fake_pool, email_taken, detail):
+    """A duplicate signup costs the INSERT plus one lookup to name the colliding field."""
+    payload = {"username": "alice", "email": "alice@example.com", "password": "CorrectHorse1!Battery"}
+    # The INSERT ... ON CONFLICT DO NOTHING returns no id, then the lookup names the field
+    fake_pool.fetchval_results = [None, email_taken]
+    app.dependency_overrides[main.get_db_pool] = lambda: fake_pool
+    try:
+        r = client.post("/signup", json=payload)
+    finally:
+        app.dependency_overrides.clear()
+    assert r.status_code == 400
+    assert r.json()["detail"] == detail
+    assert "ON CONFLICT DO NOTHING" in fake_pool.queries[0]
+    assert len(fake_pool.queries) == 2
+
+
+def test_status_reads_cached_database_state(fake_pool, monkeypatch):
+    """/status answers from the prober's last result and only pings itself when that is stale."""
+    async def fake_get_db_pool():
+        return fake_pool
+
+    monkeypatch.setattr(main, "get_db_pool", fake_get_db_pool)
+    monkeypatch.setattr(main, "_db_alive", False)
+    monkeypatch.setattr(main, "_db_checked_at", main.time.monotonic())
+    assert client.get("/status").json()["status"] == "unhealthy"
+    assert fake_pool.acquired == 0
+
+    monkeypatch.setattr(main, "_db_checked_at", float("-inf"))
+    assert client.get("/status").json()["status"] == "healthy"
+    assert client.get("/status").json()["status"] == "healthy"
+    assert fake_pool.acquired == 1
+
+
+def test_pool_metrics_read_existing_pool_without_acquiring(fake_pool, monkeypatch):
+    """/metrics/pool reports the live pool and the same numbers are scraped from /metrics."""
+    async def fail_get_db_pool():
+        raise AssertionError("pool metrics must not create the pool")
+
+    monkeypatch.setattr(main, "get_db_pool", fail_get_db_pool)
+    monkeypatch.setattr(main, "current_db_pool", lambda: None)
+    assert client.get("/metrics/pool").status_code == 503
+
+    monkeypatch.setattr(main, "current_db_pool", lambda: fake_pool)
+    r = client.get("/metrics/pool")
+    assert r.status_code == 200
+    assert r.json()["pool"]["active_connections"] == 1
+    assert r.json()["pool"]["utilization_percent"] == 25.0
+
+    monkeypatch.setattr(dependencies, "_db_pool", fake_pool)
+    body = client.get("/metrics").text
+    assert "db_pool_size 4.0" in body
+    assert "db_pool_idle_connections 3.0" in body
+    assert fake_pool.timeouts == []
+
+
+def test_unknown_endpoint_lists_available_endpoints():
+    r = client.get("/no/such/\"path")
+    assert r.status_code == 404
+    body = r.json()
+    assert body["detail"] == "Endpoint not found"
+    assert body["path"] == "/no/such/\"path"
+    assert body["method"] == "GET"
+    assert "/signup" in body["available_endpoints"]
+    assert body["service"] == "auth-service"
+
+
+def test_token_endpoint_rejects_unknown_user_like_login(fake_pool):
+    app.dependency_overrides[main.get_db_pool] = lambda: fake_pool
+    try:
+        for path in ("/login", "/token"):
+            r = client.post(path, data={"username": "nobody@example.com", "password": "wrong"})
+            assert r.status_code == 401
+            assert r.json()["detail"] == "Incorrect email or password"
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_health_reuses_a_recent_database_probe(fake_pool, monkeypatch):
+    async def fail_get_db_pool():
+        raise AssertionError("/health must not ping while the last probe is fresh")
+
+    async def no_redis():
+        return None
+
+    monkeypatch.setattr(main, "get_db_pool", fail_get_db_pool)
+    monkeypatch.setattr(main, "get_redis", no_redis)
+    monkeypatch.setattr(main, "current_db_pool", lambda: fake_pool)
+    monkeypatch.setattr(main, "_db_alive", True)
+    monkeypatch.setattr(main, "_db_ping_seconds", 0.002)
+    monkeypatch.setattr(main, "_db_ping_ms", 2.0)
+    monkeypatch.setattr(main, "_db_checked_at", main.time.monotonic())
+    body = client.get("/health").json()
+    assert body["database"]["status"] == "connected"
+    assert body["database"]["response_time_ms"] == 2.0
+
+    monkeypatch.setattr(main, "_db_alive", False)
+    monkeypatch.setattr(main, "_db_error", "connection refused")
+    body = client.get("/health").json()
+    assert body["status"] == "unhealthy"
+    assert body["error"] == "connection refused"
+
+
+def test_login_sheds_load_when_no_connection_frees_up(fake_pool):
+    fake_pool.acquire_error = main.asyncio.TimeoutError()
+    app.dependency_overrides[main.get_db_pool] = lambda: fake_pool
+    try:
+        r = client.post("/login", data={"username": "alice@example.com", "password": "whatever"})
+    finally:
+        app.dependency_overrides.clear()
+    assert fake_pool.timeouts == [main.DB_ACQUIRE_TIMEOUT]
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+    assert r.json()["retry_after"] == 1
+
+
+def test_revoking_a_malformed_token_is_a_client_error(jwt_secret):
+    app.dependency_overrides[main.verify_token] = lambda: "alice@example.com"
+    try:
+        r = client.post("/token/revoke", json={"token": "not-a-jwt"})
+    finally:
+        app.dependency_overrides.clear()
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Malformed token"
@@ -1,19 +1,9 @@
-import types
-import sys
-import pathlib
+import asyncio
+import threading
 import types as _types
-import importlib
 import pytest
 
-SERVICE_SRC = pathlib.Path(__file__).resolve().parents[2] / "src"
-PACKAGE_NAME = "authservice"
-
-if PACKAGE_NAME not in sys.modules:
-    pkg = types.ModuleType(PACKAGE_NAME)
-    pkg.__path__ = [str(SERVICE_SRC.parent)]
-    sys.modules[PACKAGE_NAME] = pkg
-
-messaging = importlib.import_module(f"{PACKAGE_NAME}.messaging")
+from authservice import messaging
 
 class DummyChannel:
     """Minimal stub for pika channel used in tests."""
@@ -67,7 +57,6 @@ def test_publish_with_stubbed_channel(monkeypatch):
     monkeypatch.setattr(bus, "connection", dummy_connection, raising=False)
 
     # Now publish an event
-    import asyncio
     asyncio.run(
         bus.publish("user.created", {"id": "123"})
     )
@@ -75,4 +64,129 @@ def test_publish_with_stubbed_channel(monkeypatch):
     assert dummy_channel.published  # Something was published
     exchange, routing_key, body = dummy_channel.published[0]
     assert exchange == bus.exchange_name
-    assert routing_key == "user.created" 
\ No newline at end of file
+    assert routing_key == "user.created" 
+
+def test_enqueued_events_are_published_in_one_batch(monkeypatch):
+    bus = messaging.EventBus()
+    dummy_channel = DummyChannel()
+    monkeypatch.setattr(bus, "channel", dummy_channel, raising=False)
+    monkeypatch.setattr(bus, "connection", _types.SimpleNamespace(is_closed=False, close=lambda: None), raising=False)
+
+    batches = []
+    publish_batch = bus._publish_batch
+
+    def recording_publish_batch(batch):
+        batches.append(len(batch))
+        publish_batch(batch)
+
+    monkeypatch.setattr(bus, "_publish_batch", recording_publish_batch)
+
+    async def scenario():
+        for i in range(3):
+            assert bus.enqueue("user.created", {"id": str(i)})
+        # close() flushes whatever is still queued before disconnecting
+        await bus.close()
+
+    asyncio.run(scenario())
+
+    assert batches == [3]
+    assert [body for _, _, body in dummy_channel.published] == [b'{"id":"0"}', b'{"id":"1"}', b'{"id":"2"}']
+
+
+def test_enqueue_drops_events_when_queue_is_full(monkeypatch):
+    monkeypatch.setattr(messaging, "EVENT_QUEUE_SIZE", 1)
+    bus = messaging.EventBus()
+
+    async def scenario():
+        accepted = [bus.enqueue("user.created", {"id": str(i)}) for i in range(2)]
+        bus._worker.cancel()
+        return accepted
+
+    assert asyncio.run(scenario()) == [True, False]
+
+
+def test_worker_lingers_for_events_arriving_after_the_first(monkeypatch):
+    monkeypatch.setattr(messaging, "EVENT_BATCH_LINGER", 0.05)
+    bus = messaging.EventBus()
+    monkeypatch.setattr(bus, "channel", DummyChannel(), raising=False)
+    monkeypatch.setattr(bus, "connection", _types.SimpleNamespace(is_closed=False, close=lambda: None), raising=False)
+
+    batches = []
+    monkeypatch.setattr(bus, "_publish_batch", lambda batch: batches.append(len(batch)))
+
+    async def scenario():
+        bus.enqueue("user.created", {"id": "0"})
+        await asyncio.sleep(0.01)  # the worker has taken the first event and is lingering
+        bus.enqueue("user.created", {"id": "1"})
+        await bus.close()
+
+    asyncio.run(scenario())
+
+    assert batches == [2]
+
+
+def test_publish_reuses_prebuilt_properties(monkeypatch):
+    bus = messaging.EventBus()
+    recorded = []
+
+    class _Channel(DummyChannel):
+        def basic_publish(self, exchange, routing_key, body, properties=None):
+            recorded.append((body, properties))
+
+    monkeypatch.setattr(bus, "channel", _Channel(), raising=False)
+    monkeypatch.setattr(bus, "connection", _types.SimpleNamespace(is_closed=False), raising=False)
+
+    asyncio.run(bus.publish("user.created", {"id": "1"}))
+    asyncio.run(bus.publish("user.created", {"id": "2"}))
+
+    assert [body for body, _ in recorded] == [b'{"id":"1"}', b'{"id":"2"}']
+    assert all(properties is bus._properties for _, properties in recorded)
+
+
+def test_publishes_run_on_the_connection_thread(monkeypatch):
+    bus = messaging.EventBus()
+    threads = []
+
+    class _Channel(DummyChannel):
+        def basic_publish(self, exchange, routing_key, body, properties=None):
+            threads.append(threading.get_ident())
+
+    monkeypatch.setattr(bus, "channel", _Channel(), raising=False)
+    monkeypatch.setattr(bus, "connection", _types.SimpleNamespace(is_closed=False, close=lambda: None), raising=False)
+
+    async def scenario():
+        assert await bus.publish("user.created", {"id": "0"})
+        bus.enqueue("user.created", {"id": "1"})
+        await bus.close()
+        # A worker restarted after close uses the same thread
+        bus.enqueue("user.created", {"id": "2"})
+        await bus.close()
+
+    asyncio.run(scenario())
+
+    assert len(threads) == 3
+    assert len(set(threads)) == 1
+    assert threads[0] != threading.get_ident()
+
+
+def test_partially_published_batch_logs_unsent_events(monkeypatch, caplog):
+    bus = messaging.EventBus()
+
+    class _FlakyChannel(DummyChannel):
+        def basic_publish(self, exchange, routing_key, body, properties=None):
+            if self.published:
+                raise RuntimeError("channel closed")
+            super().basic_publish(exchange, routing_key, body, properties)
+
+    channel = _FlakyChannel()
+    monkeypatch.setattr(bus, "channel", channel, raising=False)
+    monkeypatch.setattr(bus, "connection", _types.SimpleNamespace(is_closed=False), raising=False)
+
+    batch = [("user.created", b'{"id":"0"}'), ("user.created", b'{"id":"1"}'), ("user.deleted", b'{"id":"2"}')]
+    with caplog.at_level("ERROR"):
+        assert bus._publish_batch(batch) == 1
+
+    assert len(channel.published) == 1
+    assert "Failed to publish 2 of 3 events" in caplog.text
+    assert 'Unpublished user.created event: {"id":"1"}' in caplog.text
+    assert 'Unpublished user.deleted event: {"id":"2"}' in caplog.text
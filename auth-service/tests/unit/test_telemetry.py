@@ -1,17 +1,4 @@
-import sys
-import pathlib
-import types
-import importlib
-
-SERVICE_SRC = pathlib.Path(__file__).resolve().parents[2] / "src"
-PACKAGE_NAME = "authservice"
-
-if PACKAGE_NAME not in sys.modules:
-    pkg = types.ModuleType(PACKAGE_NAME)
-    pkg.__path__ = [str(SERVICE_SRC)]
-    sys.modules[PACKAGE_NAME] = pkg
-
-telemetry = importlib.import_module(f"{PACKAGE_NAME}.telemetry")
+from authservice import telemetry
 
 
 def test_create_span_and_attributes():
@@ -22,4 +9,14 @@ def test_create_span_and_attributes():
     finally:
         # Ensure we end the span even if add_span_attributes failed
         span.end()
-    # At this point no assertion is strictly required; absence of exceptions is success 
\ No newline at end of file
+    # At this point no assertion is strictly required; absence of exceptions is success 
+
+def test_extract_context_matches_tracing_switch():
+    class _Request:
+        headers = {"traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"}
+
+    context = telemetry.extract_context_from_request(_Request())
+    if telemetry.OTEL_ENABLED:
+        assert context is not None
+    else:
+        assert context is None
@@ -1,19 +1,7 @@
 import logging
-import sys
-import pathlib
-import types
-import importlib
 import pytest
 
-SERVICE_SRC = pathlib.Path(__file__).resolve().parents[2] / "src"
-PACKAGE_NAME = "authservice"
-
-if PACKAGE_NAME not in sys.modules:
-    pkg = types.ModuleType(PACKAGE_NAME)
-    pkg.__path__ = [str(SERVICE_SRC)]
-    sys.modules[PACKAGE_NAME] = pkg
-
-utils = importlib.import_module(f"{PACKAGE_NAME}.utils")
+from authservice import utils
 
 
 def test_log_request_info_caplog(caplog):
@@ -21,4 +9,35 @@ def test_log_request_info_caplog(caplog):
     with caplog.at_level(logging.INFO, logger=utils.logger.name):
         utils.log_request_info("GET", "/health")
     # Only one record should be emitted and contain the expected substrings
-    assert any("Received GET request to /health" in record.message for record in caplog.records) 
\ No newline at end of file
+    assert any("Received GET request to /health" in record.message for record in caplog.records) 
+
+def test_local_rate_limiter_counts_per_client_and_resets(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(utils.time, "monotonic", lambda: now[0])
+    limiter = utils.LocalRateLimiter(2, window=60)
+
+    assert [limiter.hit("10.0.0.1") for _ in range(3)] == [True, True, False]
+    assert limiter.hit("10.0.0.2")
+
+    now[0] += 60
+    assert limiter.hit("10.0.0.1")
+
+
+def test_utc_timestamp_is_formatted_once_per_second(monkeypatch):
+    now = [1700000000.2]
+    monkeypatch.setattr(utils.time, "time", lambda: now[0])
+    first = utils.utc_timestamp()
+    assert first == "2023-11-14T22:13:20+00:00"
+    now[0] += 0.5
+    assert utils.utc_timestamp() is first
+    now[0] += 1
+    assert utils.utc_timestamp() == "2023-11-14T22:13:21+00:00"
+
+
+def test_client_ip_ignores_forwarded_headers():
+    class _Request:
+        def __init__(self, client):
+            self.scope = {"client": client, "headers": [(b"x-forwarded-for", b"1.2.3.4")]}
+
+    assert utils.client_ip(_Request(("10.0.0.7", 5123))) == "10.0.0.7"
+    assert utils.client_ip(_Request(None)) == "127.0.0.1"
@@ -1,12 +1,38 @@
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
+from contextlib import asynccontextmanager
 from .schemas import CredentialIssue
-from .dependencies import get_db_pool, logger
-from prometheus_fastapi_instrumentator import Instrumentator
+from .dependencies import get_db_pool, close_db_pool, logger, ISSUE_CREDENTIAL_QUERY
+from prometheus_fastapi_instrumentator import Instrumentator, metrics
 import uuid
-import json
+import orjson
+import logging
+import os
+
+# Setup logging
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    logger.info("Starting up credential service...")
+    # Create the shared database pool once instead of on the first request
+    try:
+        await get_db_pool()
+    except HTTPException:
+        logger.warning("Database pool not available at startup, will retry on first request")
+    # All routes are registered by now; pay for the schema walk before the first docs fetch
+    _cache_openapi_schema()
+    logger.info("Credential service startup complete")
+    
+    yield
+    
+    # Shutdown
+    logger.info("Shutting down credential service...")
+    await close_db_pool()
+    logger.info("Credential service shutdown complete")
 
 app = FastAPI(
     title="DIDentity Credential Service",
@@ -24,9 +50,20 @@ app = FastAPI(
             "name": "health",
             "description": "Health check endpoint"
         }
-    ]
+    ],
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
-Instrumentator().instrument(app).expose(app)
+METRICS_EXCLUDED_HANDLERS = ["^/health$", "^/metrics$"]
+METRICS_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5)  # seconds
+Instrumentator(
+    should_group_status_codes=True,
+    should_ignore_untemplated=True,
+    excluded_handlers=METRICS_EXCLUDED_HANDLERS,
+    inprogress_labels=False,
+).add(metrics.requests()).add(
+    metrics.latency(buckets=METRICS_LATENCY_BUCKETS)
+).instrument(app).expose(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -54,47 +91,52 @@ async def redoc_html():
         redoc_js_url="https://cdn.jsdelivr.net/npm/redoc@next/bundles/redoc.standalone.js",
     )
 
+_openapi_bytes = None
+
+def _cache_openapi_schema() -> bytes:
+    """Build and encode the OpenAPI schema once; routes don't change after import"""
+    global _openapi_bytes
+    if _openapi_bytes is None:
+        openapi_schema = app.openapi()
+        # Force OpenAPI 3.0.3 for Swagger UI compatibility
+        openapi_schema["openapi"] = "3.0.3"
+        _openapi_bytes = orjson.dumps(openapi_schema)
+    return _openapi_bytes
+
 @app.get("/openapi.json", include_in_schema=False)
 async def get_openapi_schema():
-    openapi_schema = app.openapi()
-    # Force OpenAPI 3.0.3 for Swagger UI compatibility
-    openapi_schema["openapi"] = "3.0.3"
-    return JSONResponse(content=openapi_schema)
+    return Response(_cache_openapi_schema(), media_type="application/json")
 
 @app.post("/credentials/issue", tags=["credentials"])
 async def issue_credential(cred: CredentialIssue, pool=Depends(get_db_pool)):
-    logger.info(f"Issuing credential for DID: {cred.holder_did}")
+    logger.info("Issuing credential for DID: %s", cred.holder_did)
     try:
+        credential_id = f"cred:{uuid.uuid4()}"
         async with pool.acquire() as conn:
-            # Verify DID exists
-            did_exists = await conn.fetchval(
-                "SELECT EXISTS(SELECT 1 FROM dids WHERE did = $1)",
-                cred.holder_did
-            )
-            if not did_exists:
-                raise HTTPException(status_code=404, detail="DID not found")
-
-            credential_id = f"cred:{uuid.uuid4()}"
-            await conn.execute(
-                "INSERT INTO credentials (credential_id, issuer, holder, type, credential) VALUES ($1, 'system', $2, 'VerifiableCredential', $3)",
-                credential_id, cred.holder_did, json.dumps(cred.credential_data)
+            # Insert only if the holder DID exists, checked in the same round trip. DIDs can
+            # be deleted, so the existence check is not cached.
+            inserted = await conn.fetchval(
+                ISSUE_CREDENTIAL_QUERY,
+                credential_id, cred.holder_did, orjson.dumps(cred.credential_data).decode()
             )
-            
-            logger.info(f"Successfully issued credential: {credential_id}")
-            return {"credential_id": credential_id}
+        if inserted is None:
+            raise HTTPException(status_code=404, detail="DID not found")
+        
+        logger.info("Successfully issued credential: %s", credential_id)
+        return {"credential_id": credential_id}
     except HTTPException as he:
         raise
     except Exception as e:
-        logger.error(f"Failed to issue credential: {str(e)}")
+        logger.error("Failed to issue credential: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/health", tags=["health"])
 async def health_check():
     try:
-        pool = await get_db_pool().__anext__()
+        pool = await get_db_pool()
         async with pool.acquire() as conn:
             await conn.fetchval("SELECT 1")
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         return {"status": "unhealthy", "error": str(e)}
\ No newline at end of file
@@ -3,7 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
 from contextlib import asynccontextmanager
-from .dependencies import get_db_pool
+from .dependencies import get_db_pool, RESOLVE_DID_QUERY, INSERT_DID_QUERY
 from .schemas import (
     DIDCreate, DIDDocument, DIDResolution, DIDMethod,
     VerificationMethod, DIDResolutionMetadata, DIDDocumentMetadata
@@ -15,13 +15,13 @@ import json
 import uuid
 from datetime import datetime, timezone
 import os
-from prometheus_fastapi_instrumentator import Instrumentator
+from prometheus_fastapi_instrumentator import Instrumentator, metrics
 
 # Set service name for messaging
 os.environ["SERVICE_NAME"] = "did-service"
 
 # Setup logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 @asynccontextmanager
@@ -66,7 +66,16 @@ app = FastAPI(
 )
 
 # Add instrumentation
-Instrumentator().instrument(app).expose(app)
+METRICS_EXCLUDED_HANDLERS = ["^/health$", "^/metrics$"]
+METRICS_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5)  # seconds
+Instrumentator(
+    should_group_status_codes=True,
+    should_ignore_untemplated=True,
+    excluded_handlers=METRICS_EXCLUDED_HANDLERS,
+    inprogress_labels=False,
+).add(metrics.requests()).add(
+    metrics.latency(buckets=METRICS_LATENCY_BUCKETS)
+).instrument(app).expose(app)
 
 # Add CORS middleware
 app.add_middleware(
@@ -205,7 +214,7 @@ def generate_did_document(did: str, method: DIDMethod, controller: str = None):
 
 async def handle_user_created(data):
     """Handle user.created events to automatically create a DID."""
-    logger.info(f"Handling user.created event for user {data['user_id']}")
+    logger.info("Handling user.created event for user %s", data['user_id'])
     try:
         # Create a DID for the new user
         user_id = data["user_id"]
@@ -218,14 +227,14 @@ async def handle_user_created(data):
         resolution = generate_did_document(did_id, method)
         
         # Store in database
-        pool = await get_db_pool().__anext__()
+        pool = await get_db_pool()
         async with pool.acquire() as conn:
             await conn.execute(
-                "INSERT INTO dids (did, document, user_id) VALUES ($1, $2, $3)",
+                INSERT_DID_QUERY,
                 did_id, json.dumps(resolution.didDocument.dict(by_alias=True)), user_id
             )
         
-        logger.info(f"Created DID {did_id} for user {user_id}")
+        logger.info("Created DID %s for user %s", did_id, user_id)
         
         # Publish DID created event
         await event_bus.publish("did.created", {
@@ -233,7 +242,7 @@ async def handle_user_created(data):
             "user_id": user_id
         })
     except Exception as e:
-        logger.error(f"Error creating DID for user {data['user_id']}: {str(e)}")
+        logger.error("Error creating DID for user %s: %s", data['user_id'], e)
 
 @app.post("/dids", response_model=DIDDocument, tags=["dids"])
 async def create_did(did: DIDCreate, background_tasks: BackgroundTasks, request: Request, pool=Depends(get_db_pool)):
@@ -249,7 +258,7 @@ async def create_did(did: DIDCreate, background_tasks: BackgroundTasks, request:
     # Create a tracing span
     context = extract_context_from_request(request)
     with create_span("create_did", context=context, attributes={"method": did.method, "identifier": did.identifier}) as span:
-        logger.info(f"Creating DID with method: {did.method}")
+        logger.info("Creating DID with method: %s", did.method)
         try:
             async with pool.acquire() as conn:
                 did_id = f"did:{did.method}:{did.identifier}"
@@ -267,7 +276,7 @@ async def create_did(did: DIDCreate, background_tasks: BackgroundTasks, request:
                     did_id, json.dumps(did_document.dict(by_alias=True))
                 )
                 
-                logger.info(f"Successfully created DID: {did_id}")
+                logger.info("Successfully created DID: %s", did_id)
                 
                 # Publish DID created event in background
                 background_tasks.add_task(
@@ -285,7 +294,7 @@ async def create_did(did: DIDCreate, background_tasks: BackgroundTasks, request:
             mark_span_error(he)
             raise
         except Exception as e:
-            logger.error(f"Error creating DID: {str(e)}")
+            logger.error("Error creating DID: %s", e)
             mark_span_error(e)
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -301,16 +310,14 @@ async def resolve_did(did: str, request: Request, pool=Depends(get_db_pool)):
     # Create a tracing span
     context = extract_context_from_request(request)
     with create_span("resolve_did", context=context, attributes={"did": did}) as span:
-        logger.info(f"Resolving DID: {did}")
+        logger.info("Resolving DID: %s", did)
         try:
             async with pool.acquire() as conn:
                 # Find DID in database
-                result = await conn.fetchrow(
-                    "SELECT document, created_at, updated_at FROM dids WHERE did = $1", did
-                )
+                result = await conn.fetchrow(RESOLVE_DID_QUERY, did)
                 
                 if not result:
-                    logger.warning(f"DID not found: {did}")
+                    logger.warning("DID not found: %s", did)
                     error_msg = "DID not found"
                     
                     resolution_metadata = DIDResolutionMetadata(
@@ -354,7 +361,7 @@ async def resolve_did(did: str, request: Request, pool=Depends(get_db_pool)):
                 )
                 
         except Exception as e:
-            logger.error(f"Error resolving DID: {str(e)}")
+            logger.error("Error resolving DID: %s", e)
             mark_span_error(e)
             raise HTTPException(status_code=500, detail=f"Error resolving DID: {str(e)}")
 
@@ -364,10 +371,10 @@ async def health_check():
     Health check endpoint that verifies the service and database connection.
     """
     try:
-        pool = await get_db_pool().__anext__()
+        pool = await get_db_pool()
         async with pool.acquire() as conn:
             await conn.fetchval("SELECT 1")
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         return {"status": "unhealthy", "error": str(e)}
\ No newline at end of file
@@ -43,10 +43,10 @@ class EventBus:
                 durable=True
             )
             
-            logger.info(f"Connected to RabbitMQ at {self.host}")
+            logger.info("Connected to RabbitMQ at %s", self.host)
             return True
         except Exception as e:
-            logger.error(f"Failed to connect to RabbitMQ: {str(e)}")
+            logger.error("Failed to connect to RabbitMQ: %s", e)
             return False
     
     async def publish(self, event_type: str, data: Dict[str, Any]):
@@ -69,10 +69,10 @@ class EventBus:
                 )
             )
             
-            logger.info(f"Published event {event_type}: {message}")
+            logger.info("Published event %s: %s", event_type, message)
             return True
         except Exception as e:
-            logger.error(f"Failed to publish event {event_type}: {str(e)}")
+            logger.error("Failed to publish event %s: %s", event_type, e)
             return False
     
     async def subscribe(self, event_type: str, callback: Callable):
@@ -102,10 +102,10 @@ class EventBus:
                 auto_ack=False
             )
             
-            logger.info(f"Subscribed to event {event_type} on queue {queue_name}")
+            logger.info("Subscribed to event %s on queue %s", event_type, queue_name)
             return True
         except Exception as e:
-            logger.error(f"Failed to subscribe to event {event_type}: {str(e)}")
+            logger.error("Failed to subscribe to event %s: %s", event_type, e)
             return False
     
     def _on_message(self, channel, method, properties, body):
@@ -122,9 +122,9 @@ class EventBus:
             # Acknowledge message
             channel.basic_ack(delivery_tag=method.delivery_tag)
             
-            logger.info(f"Processed event {event_type}")
+            logger.info("Processed event %s", event_type)
         except Exception as e:
-            logger.error(f"Error processing message: {str(e)}")
+            logger.error("Error processing message: %s", e)
             # Reject message and requeue
             channel.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
     
@@ -137,7 +137,7 @@ class EventBus:
             logger.info("Starting to consume messages")
             self.channel.start_consuming()
         except Exception as e:
-            logger.error(f"Error consuming messages: {str(e)}")
+            logger.error("Error consuming messages: %s", e)
     
     async def close(self):
         """Close connection to RabbitMQ."""
@@ -146,7 +146,7 @@ class EventBus:
                 logger.info("Closing connection to RabbitMQ")
                 self.connection.close()
         except Exception as e:
-            logger.error(f"Error closing RabbitMQ connection: {str(e)}")
+            logger.error("Error closing RabbitMQ connection: %s", e)
 
 # Create a singleton instance
 event_bus = EventBus() 
\ No newline at end of file
@@ -41,10 +41,10 @@ def init_tracer():
         # Set the provider as the global provider
         trace.set_tracer_provider(provider)
         
-        logger.info(f"OpenTelemetry tracer initialized for {os.environ.get('SERVICE_NAME', 'did-service')}")
+        logger.info("OpenTelemetry tracer initialized for %s", os.environ.get('SERVICE_NAME', 'did-service'))
         return provider
     except Exception as e:
-        logger.error(f"Failed to initialize OpenTelemetry tracer: {str(e)}")
+        logger.error("Failed to initialize OpenTelemetry tracer: %s", e)
         return None
 
 # Get a tracer
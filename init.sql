@@ -43,8 +43,10 @@ CREATE TABLE IF NOT EXISTS verifications (
 
 -- Performance Optimization: Add critical indexes
 -- Users table indexes
-CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_email ON users(email);
-CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_username ON users(username);
+-- email and username lookups use the indexes behind their UNIQUE constraints; a second
+-- index on either column would only add work to every signup
+DROP INDEX CONCURRENTLY IF EXISTS idx_users_email;
+DROP INDEX CONCURRENTLY IF EXISTS idx_users_username;
 CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_created_at ON users(created_at);
 
 -- DIDs table indexes
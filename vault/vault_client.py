@@ -15,6 +15,7 @@ import time
 import logging
 import requests
 import threading
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any, Optional, Union
 from datetime import datetime, timedelta
 import json
@@ -57,6 +58,13 @@ class VaultClient:
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         
+        # Pooled keep-alive session without adapter retries: _make_request already retries
+        # max_retries times, and retrying in both places would multiply the attempts
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        
         # Cache for secrets with timestamps
         self._cache = {}
         self._cache_lock = threading.RLock()
@@ -104,7 +112,7 @@ class VaultClient:
         
         for attempt in range(self.max_retries):
             try:
-                response = requests.request(
+                response = self._session.request(
                     method=method,
                     url=url,
                     json=data,
@@ -1,19 +1,33 @@
+import asyncio
 import asyncpg
 import logging
 import hvac
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from fastapi import HTTPException
 from typing import AsyncGenerator
 
 # Setup logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session so Vault requests reuse pooled keep-alive connections. get_secret
+# makes a single attempt, so transient gateway errors are retried by the adapter.
+_vault_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+)
+vault_session = requests.Session()
+vault_session.mount('http://', _vault_adapter)
+vault_session.mount('https://', _vault_adapter)
+
 # Vault client setup
 vault_client = hvac.Client(
     url=os.environ.get('VAULT_ADDR', 'http://vault:8200'),
-    token=os.environ.get('VAULT_TOKEN', 'root')
+    token=os.environ.get('VAULT_TOKEN', 'root'),
+    session=vault_session
 )
 
 # Get secrets from Vault
@@ -23,7 +37,7 @@ def get_secret(path, key=None):
         url = f"{vault_client.url}/v1/kv/data/{path}"
         headers = {"X-Vault-Token": vault_client.token}
         
-        response = requests.get(url, headers=headers)
+        response = vault_session.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -33,7 +47,7 @@ def get_secret(path, key=None):
             return secret_data.get(key)
         return secret_data
     except Exception as e:
-        logger.error(f"Error fetching secret from Vault: {e}, on get {vault_client.url}/v1/kv/data/{path}")
+        logger.error("Error fetching secret from Vault: %s, on get %s/v1/kv/data/%s", e, vault_client.url, path)
         # In production, fail fast instead of using fallbacks
         raise HTTPException(
             status_code=500,
@@ -54,35 +68,37 @@ def get_db_url():
         
         return f"postgresql://{username}:{password}@{host}:{port}/{database}"
     except Exception as e:
-        logger.error(f"Failed to get database URL from Vault: {str(e)}")
+        logger.error("Failed to get database URL from Vault: %s", e)
         # Fallback to environment variable or default
         return os.environ.get('DATABASE_URL', 'postgresql://postgres:VaultSecureDB2024@db:5432/decentralized_id')
 
 # Global connection pool (reuse across requests)
 _db_pool = None
+_db_pool_lock = asyncio.Lock()
 
 async def get_db_pool():
     """Get or create database connection pool"""
     global _db_pool
-    if _db_pool is None:
-        try:
-            _db_pool = await asyncpg.create_pool(
-                get_db_url(),
-                min_size=10,
-                max_size=50,
-                command_timeout=30,
-                server_settings={
-                    'application_name': 'verification_service',
-                    'tcp_keepalives_idle': '600',
-                    'tcp_keepalives_interval': '30',
-                    'tcp_keepalives_count': '3',
-                },
-                max_inactive_connection_lifetime=300
-            )
-            logger.info(f"Database pool created: min=10, max=50")
-        except Exception as e:
-            logger.error(f"Failed to create database pool: {e}")
-            raise HTTPException(status_code=500, detail="Database connection failed")
+    async with _db_pool_lock:
+        if _db_pool is None:
+            try:
+                _db_pool = await asyncpg.create_pool(
+                    get_db_url(),
+                    min_size=10,
+                    max_size=50,
+                    command_timeout=30,
+                    server_settings={
+                        'application_name': 'verification_service',
+                        'tcp_keepalives_idle': '600',
+                        'tcp_keepalives_interval': '30',
+                        'tcp_keepalives_count': '3',
+                    },
+                    max_inactive_connection_lifetime=300
+                )
+                logger.info("Database pool created: min=10, max=50")
+            except Exception as e:
+                logger.error("Failed to create database pool: %s", e)
+                raise HTTPException(status_code=500, detail="Database connection failed")
     
     return _db_pool
 
@@ -99,23 +115,5 @@ async def get_db_connection() -> AsyncGenerator[asyncpg.Connection, None]:
         logger.error("Database authentication failed")
         raise HTTPException(status_code=500, detail="Database authentication failed")
     except Exception as e:
-        logger.error(f"Database connection error: {str(e)}")
+        logger.error("Database connection error: %s", e)
         raise HTTPException(status_code=500, detail="Database connection error")
-
-# Legacy function for backward compatibility  
-async def get_db_pool_legacy() -> AsyncGenerator[asyncpg.Pool, None]:
-    try:
-        pool = await get_db_pool()
-        if not pool:
-            raise HTTPException(status_code=500, detail="Failed to create database pool")
-        try:
-            yield pool
-        finally:
-            if pool:
-                await pool.close()
-    except asyncpg.InvalidPasswordError:
-        logger.error("Database authentication failed")
-        raise HTTPException(status_code=500, detail="Database authentication failed")
-    except Exception as e:
-        logger.error(f"Database connection error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Database connection error")
\ No newline at end of file
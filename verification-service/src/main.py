@@ -4,8 +4,13 @@ from fastapi.responses import JSONResponse
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
 from .schemas import CredentialVerify
 from .dependencies import get_db_pool, logger
-from prometheus_fastapi_instrumentator import Instrumentator
+from prometheus_fastapi_instrumentator import Instrumentator, metrics
 import json
+import logging
+import os
+
+# Setup logging
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 app = FastAPI(
     title="DIDentity Verification Service",
@@ -25,7 +30,16 @@ app = FastAPI(
         }
     ]
 )
-Instrumentator().instrument(app).expose(app)
+METRICS_EXCLUDED_HANDLERS = ["^/health$", "^/metrics$"]
+METRICS_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5)  # seconds
+Instrumentator(
+    should_group_status_codes=True,
+    should_ignore_untemplated=True,
+    excluded_handlers=METRICS_EXCLUDED_HANDLERS,
+    inprogress_labels=False,
+).add(metrics.requests()).add(
+    metrics.latency(buckets=METRICS_LATENCY_BUCKETS)
+).instrument(app).expose(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -62,7 +76,7 @@ async def get_openapi_schema():
 
 @app.post("/credentials/verify", tags=["verification"])
 async def verify_credential(cred: CredentialVerify, pool=Depends(get_db_pool)):
-    logger.info(f"Verifying credential: {cred.credential_id}")
+    logger.info("Verifying credential: %s", cred.credential_id)
     try:
         async with pool.acquire() as conn:
             # Get credential data
@@ -90,21 +104,21 @@ async def verify_credential(cred: CredentialVerify, pool=Depends(get_db_pool)):
                 "did_document": did_document
             }
             
-            logger.info(f"Successfully verified credential: {cred.credential_id}")
+            logger.info("Successfully verified credential: %s", cred.credential_id)
             return verification_result
     except HTTPException as he:
         raise
     except Exception as e:
-        logger.error(f"Failed to verify credential: {str(e)}")
+        logger.error("Failed to verify credential: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/health", tags=["health"])
 async def health_check():
     try:
-        pool = await get_db_pool().__anext__()
+        pool = await get_db_pool()
         async with pool.acquire() as conn:
             await conn.fetchval("SELECT 1")
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         return {"status": "unhealthy", "error": str(e)}
\ No newline at end of file
@@ -3,4 +3,4 @@ import logging
 logger = logging.getLogger(__name__)
 
 def log_request_info(method: str, path: str):
-    logger.info(f"Received {method} request to {path}")
\ No newline at end of file
+    logger.info("Received %s request to %s", method, path)
\ No newline at end of file